@@ -72,90 +72,23 @@
 #
 #     def run(self):
 #         <обработка данных>
-import os
-from collections import OrderedDict
 import time
 
+from volatility.api import compute_volatilities
+from volatility.cli import make_parser, check_path, exit_on_failed, print_report, run_measured
 
-class TickerVolatility:
-    volatilities_dict = OrderedDict()
-    zero_volatilities = []
-    max_dict = OrderedDict()
-    min_dict = OrderedDict()
-
-    def __init__(self, filename):
-        self.filename = filename
-
-    def run(self):
-        with open(self.filename, 'r') as ticker:
-            head = ticker.readline().rstrip().split(',')
-            data = ticker.readline().rstrip().split(',')
-            self.row_dict = dict(zip(head, data))
-            self.row_dict['PRICE'] = float(self.row_dict['PRICE'])
-            max_price = self.row_dict['PRICE']
-            min_price = self.row_dict['PRICE']
-            for line in ticker:
-                data = line.rstrip().split(',')
-                self.row_dict = dict(zip(head, data))
-                self.row_dict['PRICE'] = float(self.row_dict['PRICE'])
-                if self.row_dict['PRICE'] > max_price:
-                    max_price = self.row_dict['PRICE']
-                if self.row_dict['PRICE'] < min_price:
-                    min_price = self.row_dict['PRICE']
-            half_sum = (max_price + min_price) / 2
-            self.volatility = ((max_price - min_price) / half_sum) * 100
-            self.act()
-
-    def act(self):
-        if self.volatility == 0:
-            TickerVolatility.zero_volatilities.append(self.row_dict['SECID'])
-        else:
-            TickerVolatility.volatilities_dict[self.row_dict['SECID']] = self.volatility
-        TickerVolatility.max_dict = self.sort_volatility_dict(dict=TickerVolatility.volatilities_dict, n=3,
-                                                              reverse=True)
-        TickerVolatility.min_dict = self.sort_volatility_dict(dict=TickerVolatility.volatilities_dict, n=3,
-                                                              reverse=False)
-        TickerVolatility.zero_volatilities.sort()
-
-    def sort_volatility_dict(self, dict, n=3, reverse=False):
-        i = 0
-        d = OrderedDict()
-        sorted_dict = OrderedDict(sorted(dict.items(), key=lambda k: k[1], reverse=reverse))
-        for ticket, value in sorted_dict.items():
-            if i == n:
-                break
-            d[ticket] = value
-            i += 1
-        return d
-
-
-start = time.time()
 if __name__ == '__main__':
+    args = make_parser().parse_args()
 
-    path = 'trades'
-    if not os.access(path, os.F_OK):
-        raise BaseException('Такой папки не существует')
-    files = os.walk(path)
-    counters = []
-
-    for dirpath, dirnames, filenames in files:
-        for file in filenames:
-            counters.append(TickerVolatility(os.path.join(dirpath, file)))
-
-    for counter in counters:
-        counter.run()
-
-    print('Максимальная волатильность:')
-    for ticket, value in TickerVolatility.max_dict.items():
-        print('\t', ticket, round(value, 2), '%')
-
-    print('Минимальная волатильность:')
-    for ticket, value in reversed(TickerVolatility.min_dict.items()):
-        print('\t', ticket, round(value, 2), '%')
+    start = time.time()
+    path = args.path
+    check_path(path)
+    result = run_measured(args, lambda instrument: compute_volatilities(
+        path, engine=args.engine, mode='serial', cache_dir=args.cache_dir, verify_hash=args.verify_hash,
+        instrument=instrument))
 
-    print('Нулевая волатильность:', end='\n\t')
-    for ticket in TickerVolatility.zero_volatilities:
-        print(ticket, end=', ')
+    print_report(result.top(args.top).items(), result.bottom(args.top).items(), result.zero_volatilities)
     print(time.time() - start)
+    exit_on_failed(result.failed)
 
 # зачёт! 🚀
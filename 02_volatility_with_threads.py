@@ -72,89 +72,26 @@
 #
 #     def run(self):
 #         <обработка данных>
-import os
 import time
-from collections import OrderedDict
-import threading
-import importlib
-
-simple_volatility = importlib.import_module('01_volatility')
-
-
-class TickerVolatility(threading.Thread, simple_volatility.TickerVolatility):
-
-    def __init__(self, filename, volatilities_dict, zero_volatilities, lock, *args, **kwargs):
-        super(TickerVolatility, self).__init__(*args, **kwargs)
-        self.filename = filename
-        self.volatilities_dict = volatilities_dict
-        self.zero_volatilities = zero_volatilities
-        self.dlock = lock
-
-    def run(self):
-        simple_volatility.TickerVolatility.run(self)
-
-    def act(self):
-        if self.volatility == 0:
-            self.zero_volatilities.append(self.row_dict['SECID'])
-        else:
-            with self.dlock:
-                self.volatilities_dict[self.row_dict['SECID']] = self.volatility
-
-
-# Здесь я все-таки решил вынести функцию, чтобы каждый объект не сортировал свой словарь
-def sort_volatility_dict(dict, n=3, reverse=False):
-    i = 0
-    d = OrderedDict()
-    sorted_dict = OrderedDict(sorted(dict.items(), key=lambda k: k[1], reverse=reverse))
-    for ticket, value in sorted_dict.items():
-        if i == n:
-            break
-        d[ticket] = value
-        i += 1
-    return d
 
+from volatility.api import compute_volatilities
+from volatility.cli import make_parser, check_path, exit_on_failed, print_report, run_measured
 
 if __name__ == '__main__':
-    start = time.time()
-    path = 'trades'
-    global_volatilities_dict = OrderedDict()
-    global_max_dict = OrderedDict()
-    global_min_dict = OrderedDict()
-    global_zero_dict = []
-    counters = []
-    lock = threading.Lock()
-
-    if not os.access(path, os.F_OK):
-        raise BaseException('Такой папки не существует')
-    files = os.walk(path)
-
-    for dirpath, dirnames, filenames in os.walk(path):
-        for file in filenames:
-            counters.append(
-                TickerVolatility(filename=os.path.join(dirpath, file), volatilities_dict=global_volatilities_dict,
-                                 zero_volatilities=global_zero_dict, lock=lock))
-
-    for counter in counters:
-        counter.start()
-    for counter in counters:
-        counter.join()
+    parser = make_parser()
+    parser.add_argument('--workers', type=int, default=None)
+    args = parser.parse_args()
 
-    global_max_dict = sort_volatility_dict(dict=global_volatilities_dict, n=3, reverse=True)
-    global_min_dict = sort_volatility_dict(dict=global_volatilities_dict, n=3, reverse=False)
-    global_zero_dict.sort()
-
-    print('Максимальная волатильность:')
-    for ticket, value in global_max_dict.items():
-        print('\t', ticket, round(value, 2), '%')
-
-    print('Минимальная волатильность:')
-    for ticket, value in reversed(global_min_dict.items()):
-        print('\t', ticket, round(value, 2), '%')
+    start = time.time()
+    path = args.path
+    check_path(path)
+    result = run_measured(args, lambda instrument: compute_volatilities(
+        path, engine=args.engine, mode='thread', workers=args.workers, cache_dir=args.cache_dir,
+        verify_hash=args.verify_hash, instrument=instrument))
 
-    print('Нулевая волатильность:', end='\n\t')
-    for ticket in global_zero_dict:
-        print(ticket, end=', ')
+    print_report(result.top(args.top).items(), result.bottom(args.top).items(), result.zero_volatilities)
 
     print(time.time() - start)
+    exit_on_failed(result.failed)
 
 # зачёт! 🚀
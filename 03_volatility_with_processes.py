@@ -72,122 +72,36 @@
 #
 #     def run(self):
 #         <обработка данных>
-import os
 import time
-from collections import OrderedDict
-import multiprocessing
-from queue import Empty
-import importlib
-
-simple_volatility = importlib.import_module('01_volatility')
-
-
-class TickerVolatility(multiprocessing.Process, simple_volatility.TickerVolatility):
-
-    def __init__(self, filename, queue, lock, zero_queue, *args, **kwargs):
-        super(TickerVolatility, self).__init__(*args, **kwargs)
-        self.filename = filename
-        self.queue = queue
-        self.zero_queue = zero_queue
-        self.dlock = lock
-
-    def run(self):
-        simple_volatility.TickerVolatility.run(self)
-
-    def act(self):
-        if self.volatility == 0:
-            print('кладу в очередь', self.row_dict['SECID'], flush=True)
-            self.zero_queue.put(self.row_dict['SECID'])
-        else:
-            self.queue.put([self.row_dict['SECID'], self.volatility])
-            print('кладу в очередь', self.row_dict['SECID'], self.volatility, flush=True)
-
-
-class Collector:
-
-    def __init__(self, tickers, lock, *args, **kwargs):
-        super(Collector, self).__init__(*args, **kwargs)
-        self.tickers = tickers
-        self.queue = multiprocessing.Queue()
-        self.zero_queue = multiprocessing.Queue()
-        self.collector_volatilities_dict = OrderedDict()
-        self.collector_zero_volatilities = []
-        self.lock = lock
-        self.ticker_proc_list = []
-
-    def sort_volatility_dict(self, dict, n=3, reverse=False):
-        i = 0
-        d = OrderedDict()
-        sorted_dict = OrderedDict(sorted(dict.items(), key=lambda k: k[1], reverse=reverse))
-        for ticket, value in sorted_dict.items():
-            if i == n:
-                break
-            d[ticket] = value
-            i += 1
-        return d
-
-    def run(self):
-        for ticker in self.tickers:
-            ticker_proc = TickerVolatility(filename=ticker, queue=self.queue, lock=self.lock,
-                                           zero_queue=self.zero_queue)
-            self.ticker_proc_list.append(ticker_proc)
-        for proc in self.ticker_proc_list:
-            proc.start()
-        while True:
-            try:
-                receiver = self.queue.get(timeout=1)
-                print('вытаскиваю из очереди', receiver, flush=True)
-                self.collector_volatilities_dict[receiver[0]] = receiver[1]
-            except Empty:
-                if not any(ticker.is_alive() for ticker in self.ticker_proc_list):
-                    break
-        while True:
-            try:
-                zero_receiver = self.zero_queue.get(timeout=1)
-                print('вытаскиваю из очереди', zero_receiver, flush=True)
-                self.collector_zero_volatilities.append(zero_receiver)
-            except Empty:
-                if not any(ticker.is_alive() for ticker in self.ticker_proc_list):
-                    break
-
-        max_dict = self.sort_volatility_dict(dict=self.collector_volatilities_dict, n=3, reverse=True)
-        min_dict = self.sort_volatility_dict(dict=self.collector_volatilities_dict, n=3, reverse=False)
-        self.collector_zero_volatilities.sort()
-
-        print(len(self.collector_volatilities_dict))
-        print('Максимальная волатильность:')
-        for ticket, value in max_dict.items():
-            print('\t', ticket, round(value, 2), '%')
-
-        print('Минимальная волатильность:')
-        for ticket, value in reversed(min_dict.items()):
-            print('\t', ticket, round(value, 2), '%')
-
-        print('Нулевая волатильность:', end='\n\t')
-        for ticket in self.collector_zero_volatilities:
-            print(ticket, end=', ')
-
-        for proc in self.ticker_proc_list:
-            proc.join()
 
+from volatility.api import compute_volatilities
+from volatility.cli import make_parser, check_path, exit_on_failed, print_report, run_measured
 
 if __name__ == '__main__':
-    start = time.time()
-    path = 'trades'
-    counters = []
-    lock = multiprocessing.Lock()
+    parser = make_parser()
+    parser.add_argument('--mode', choices=['process', 'pool'], default='process')
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--chunksize', type=int, default=None)
+    parser.add_argument('--split-size', type=int, default=64 * 1024 * 1024,
+                        help='файлы больше этого размера в байтах делятся между процессами')
+    parser.add_argument('--transport', choices=['queue', 'shm'], default='queue',
+                        help='результаты через очередь или через таблицу в разделяемой памяти')
+    parser.add_argument('--schedule', choices=['lpt', 'order'], default='lpt',
+                        help='в режиме pool: крупные файлы первыми (lpt) или в порядке папки')
+    args = parser.parse_args()
 
-    if not os.access(path, os.F_OK):
-        raise BaseException('Такой папки не существует')
-    files = os.walk(path)
-
-    for dirpath, dirnames, filenames in os.walk(path):
-        for file in filenames:
-            counters.append(os.path.join(dirpath, file))
+    start = time.time()
+    path = args.path
+    check_path(path)
+    result = run_measured(args, lambda instrument: compute_volatilities(
+        path, engine=args.engine, mode=args.mode, workers=args.workers, chunksize=args.chunksize,
+        split_size=args.split_size, cache_dir=args.cache_dir, verify_hash=args.verify_hash,
+        transport=args.transport, schedule=args.schedule, instrument=instrument))
 
-    collector = Collector(tickers=counters, lock=lock)
-    collector.run()
+    print(len(result.volatilities))
+    print_report(result.top(args.top).items(), result.bottom(args.top).items(), result.zero_volatilities)
 
     print(time.time() - start)
+    exit_on_failed(result.failed)
 
 # зачёт! 🚀
@@ -0,0 +1,34 @@
+# -*- coding: utf-8 -*-
+
+# Та же задача, что и в 01_volatility.py, но файлы в папке trades во время торгов постоянно дописываются,
+# а результаты нужно обновлять каждые несколько секунд.
+#
+# Перечитывать каждый раз все файлы с начала слишком дорого, поэтому для каждого тикера храним текущие
+# максимальную и минимальную цены и смещение, до которого файл уже прочитан.
+# При обновлении читаются только дописанные строки, тройки максимальной и минимальной волатильности
+# и список нулевой волатильности обновляются по изменившимся тикерам.
+import argparse
+import time
+
+from volatility.cli import check_path, print_report
+from volatility.streaming import StreamingVolatility
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('path', nargs='?', default='trades')
+    parser.add_argument('--interval', type=float, default=5)
+    parser.add_argument('--once', action='store_true', help='один проход без ожидания новых сделок')
+    args = parser.parse_args()
+
+    check_path(args.path)
+    streaming = StreamingVolatility(args.path)
+    while True:
+        start = time.time()
+        changed = streaming.refresh()
+        print_report(*streaming.report())
+        print()
+        print('обновлено тикеров:', changed, 'за', round(time.time() - start, 3), 'с')
+        if args.once:
+            break
+        time.sleep(args.interval)
@@ -0,0 +1,30 @@
+# -*- coding: utf-8 -*-
+
+# Та же задача, что и в 01_volatility.py, но на asyncio.
+#
+# В 02_volatility_with_threads.py все потоки разбирают строки и упираются в GIL, а на каждый файл
+# заводится свой поток. Здесь файлы читают несколько читателей крупными блоками, а разбор блоков
+# уходит в пул процессов. Пока процессы считают, читатели уже тянут следующие блоки -
+# диск (или сетевая папка с архивом сделок) и процессоры заняты одновременно.
+import time
+
+from volatility.aio import compute_volatilities
+from volatility.cli import make_parser, check_path, exit_on_failed, print_report, run_measured
+
+if __name__ == '__main__':
+    parser = make_parser(engine=False, cache=False, instrument=False)
+    parser.add_argument('--readers', type=int, default=4, help='сколько файлов читать одновременно')
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--chunk-size', type=int, default=4 * 1024 * 1024)
+    args = parser.parse_args()
+
+    start = time.time()
+    path = args.path
+    check_path(path)
+    result = run_measured(args, lambda instrument: compute_volatilities(
+        path, readers=args.readers, workers=args.workers, chunk_size=args.chunk_size))
+
+    print_report(result.top(args.top).items(), result.bottom(args.top).items(), result.zero_volatilities)
+
+    print(time.time() - start)
+    exit_on_failed(result.failed)
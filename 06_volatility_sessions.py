@@ -0,0 +1,42 @@
+# -*- coding: utf-8 -*-
+
+# Та же задача, что и в 01_volatility.py, но за много торговых дней сразу.
+#
+# Сделки каждого дня лежат в своей подпапке (или дата есть в имени файла), например
+#   history/2019-01-10/TICKER_AFH9.csv
+# Нужно вывести тройки волатильности по каждой сессии и по всему периоду целиком.
+# Запускать скрипт отдельно на каждый день - значит каждый раз заново поднимать пул процессов,
+# поэтому файлы всех дней ставятся в один пул, а по сессиям раскладываются уже готовые результаты.
+#
+#   python 06_volatility_sessions.py history --overall-only
+import time
+
+from volatility.cli import make_parser, check_path, exit_on_failed, print_report, run_measured
+from volatility.sessions import compute_sessions
+
+if __name__ == '__main__':
+    parser = make_parser()
+    parser.add_argument('--mode', choices=['serial', 'thread', 'process', 'pool'], default='pool')
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--overall-only', action='store_true', help='выводить только итог по всем сессиям')
+    args = parser.parse_args()
+
+    start = time.time()
+    path = args.path
+    check_path(path)
+    result = run_measured(args, lambda instrument: compute_sessions(
+        path, engine=args.engine, mode=args.mode, workers=args.workers, cache_dir=args.cache_dir,
+        verify_hash=args.verify_hash, instrument=instrument))
+
+    if not args.overall_only:
+        for name, session in result.sessions.items():
+            print('Сессия', name)
+            print_report(session.top(args.top).items(), session.bottom(args.top).items(), session.zero_volatilities)
+            print()
+    print('Все сессии:', len(result.sessions))
+    overall = result.overall
+    print_report(overall.top(args.top).items(), overall.bottom(args.top).items(), overall.zero_volatilities)
+    print()
+
+    print(time.time() - start)
+    exit_on_failed(result.failed)
@@ -0,0 +1,64 @@
+# -*- coding: utf-8 -*-
+
+# Та же задача, что и в 01_volatility.py, но волатильность нужна не за всю сессию, а внутри неё:
+# по каждому N-минутному интервалу и по скользящему окну в W минут.
+# Время сделки есть в каждой строке (TRADETIME), поэтому всё считается за тот же один проход по файлу.
+#
+# Выводятся тикеры с самыми бурными интервалами и окнами, полные ряды можно выгрузить в CSV:
+#   python 07_volatility_windows.py trades --step 5 --rolling 30 --csv windows.csv
+import csv
+import time
+
+from volatility.api import compute_windows
+from volatility.binstore import format_time
+from volatility.cli import make_parser, check_path, exit_on_failed, run_measured
+from volatility.topk import select
+
+
+def print_peaks(title, peaks, n):
+    print(title)
+    for secid, (volatility, day, moment) in select(peaks, n=n, reverse=True).items():
+        print('\t', secid, round(volatility, 2), '%', 'день', day + 1, format_time(moment))
+
+
+def write_series(filename, series, step):
+    with open(filename, 'w', newline='') as output:
+        writer = csv.writer(output)
+        writer.writerow(['SECID', 'KIND', 'DAY', 'START', 'END', 'VOLATILITY', 'MIN', 'MAX', 'ROWS'])
+        for secid, item in series.items():
+            for day, start, volatility, low, high, rows in item.buckets:
+                writer.writerow([secid, 'bucket', day + 1, format_time(start), format_time(start + step),
+                                 volatility, low, high, rows])
+            for day, end, volatility, low, high in item.rolling:
+                writer.writerow([secid, 'rolling', day + 1, format_time(max(end - item.width, 0)),
+                                 format_time(end), volatility, low, high, ''])
+
+
+if __name__ == '__main__':
+    parser = make_parser(engine=False, cache=False, instrument=False)
+    parser.add_argument('--step', type=int, default=5, help='длина интервала в минутах')
+    parser.add_argument('--rolling', type=int, default=None, help='ширина скользящего окна в минутах')
+    parser.add_argument('--mode', choices=['serial', 'thread', 'pool'], default='pool')
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--csv', default=None, help='выгрузить ряды по всем тикерам в CSV')
+    args = parser.parse_args()
+
+    start = time.time()
+    path = args.path
+    check_path(path)
+    step, width = args.step * 60, args.rolling * 60 if args.rolling else None
+    result = run_measured(args, lambda instrument: compute_windows(path, step=step, width=width, mode=args.mode,
+                                                                   workers=args.workers))
+    series = result.series
+
+    buckets = {secid: max((bucket[2], bucket[0], bucket[1]) for bucket in item.buckets)
+               for secid, item in series.items()}
+    print_peaks('Самые волатильные %d-минутные интервалы:' % args.step, buckets, args.top)
+    if width:
+        rolling = {secid: item.peak for secid, item in series.items() if item.peak}
+        print_peaks('Пик скользящего окна %d минут:' % args.rolling, rolling, args.top)
+    if args.csv:
+        write_series(args.csv, series, step)
+
+    print(time.time() - start)
+    exit_on_failed(result.failed)
@@ -0,0 +1,49 @@
+# -*- coding: utf-8 -*-
+
+# Та же задача, что и в 01_volatility.py, но тройки волатильности запрашиваются много раз в час.
+#
+# Каждый запуск скрипта заново поднимает интерпретатор и процессы и перечитывает все файлы, хотя с прошлого
+# запуска поменялась малая часть. Здесь сервис запускается один раз: пул процессов остаётся тёплым,
+# крайние цены всех файлов лежат в памяти, изменившиеся файлы пересчитываются раз в --interval секунд,
+# а ответы отдаются по HTTP на 127.0.0.1 или через Unix-сокет:
+#   python 08_volatility_service.py trades --port 8765
+#   curl 'http://127.0.0.1:8765/top?n=3'
+#   python 08_volatility_service.py trades --socket /tmp/volatility.sock
+#   printf 'top 3\nzero\n' | nc -U /tmp/volatility.sock
+import signal
+import sys
+import threading
+import time
+
+from volatility.cli import make_parser, check_path
+from volatility.service import VolatilityIndex, make_server, refresh_forever
+
+if __name__ == '__main__':
+    parser = make_parser(cache=False, instrument=False, top=False, profile=False)
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--socket', default=None, help='слушать Unix-сокет вместо HTTP')
+    parser.add_argument('--interval', type=float, default=5, help='как часто пересматривать папку, секунд')
+    parser.add_argument('--workers', type=int, default=None)
+    args = parser.parse_args()
+
+    check_path(args.path)
+    index = VolatilityIndex(args.path, engine=args.engine, workers=args.workers)
+    start = time.time()
+    info = index.refresh()
+    print('индекс готов: файлов', info['files'], 'за', round(time.time() - start, 3), 'с', flush=True)
+
+    server = make_server(index, port=args.port, socket_path=args.socket)
+    # по SIGTERM закрываемся так же, как по Ctrl+C: иначе процессы пула переживут сервис
+    signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))
+    stop = threading.Event()
+    refresher = threading.Thread(target=refresh_forever, args=(index, args.interval, stop), daemon=True)
+    refresher.start()
+    print('слушаю', args.socket or 'http://127.0.0.1:%d' % server.server_address[1], flush=True)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        stop.set()
+        server.server_close()
+        index.close()
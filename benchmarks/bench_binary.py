@@ -0,0 +1,48 @@
+# -*- coding: utf-8 -*-
+
+# Двоичный колоночный формат против CSV на файлах из trades.
+# Что конвертация без потерь, проверяет tests/test_binstore.py.
+#   python -m benchmarks.bench_binary [trades] [--repeat 5]
+import argparse
+import os
+import tempfile
+import time
+
+from benchmarks.bench_engines import list_files
+from volatility import binstore, engines
+
+
+def measure(engine, files, repeat):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for file in files:
+            engine(file)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('path', nargs='?', default='trades')
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as target:
+        start = time.perf_counter()
+        binary_files = sorted(binstore.convert_tree(args.path, target))
+        convert_time = time.perf_counter() - start
+        csv_files = list_files(args.path)
+        print('конвертация %d файлов: %.3f с' % (len(csv_files), convert_time))
+        print('размер: CSV %.1f МБ, двоичный %.1f МБ' % (sum(map(os.path.getsize, csv_files)) / 1024 / 1024,
+                                                         sum(map(os.path.getsize, binary_files)) / 1024 / 1024))
+        for name in engines.ENGINES:
+            if name == 'binary':
+                continue
+            try:
+                engine = engines.get_engine(name)
+            except ImportError:
+                continue
+            print('%-8s %8.3f с' % (name, measure(engine, csv_files, args.repeat)))
+        print('%-8s %8.3f с' % ('binary', measure(binstore.binary_prices, binary_files, args.repeat)))
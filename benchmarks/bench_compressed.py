@@ -0,0 +1,98 @@
+# -*- coding: utf-8 -*-
+
+# Несжатые CSV против .csv.gz и zip-архива на одном наборе.
+# Сжатый файл читается с диска в несколько раз меньшим объёмом, но его нужно распаковать - выигрыш зависит
+# от скорости хранилища. Поэтому кроме времени выводится граничная скорость диска: на хранилище медленнее неё
+# сжатый вариант быстрее несжатого. С --cold перед каждым прогоном файлы вытесняются из страничного кэша
+# (posix_fadvise DONTNEED) и время включает реальное чтение с диска.
+#   python -m benchmarks.bench_compressed --files 200 --rows 20000 --mode pool --cold
+import argparse
+import gzip
+import os
+import shutil
+import statistics
+import tempfile
+import time
+import zipfile
+
+from benchmarks.datagen import generate_trades
+from volatility.api import compute_volatilities
+
+
+def make_gzip(filenames, target):
+    os.makedirs(target)
+    for filename in filenames:
+        with open(filename, 'rb') as source, gzip.open(os.path.join(target, os.path.basename(filename) + '.gz'),
+                                                      'wb', compresslevel=6) as compressed:
+            shutil.copyfileobj(source, compressed)
+
+
+def make_zip(filenames, target):
+    os.makedirs(target)
+    with zipfile.ZipFile(os.path.join(target, 'trades.zip'), 'w', zipfile.ZIP_DEFLATED) as archive:
+        for filename in filenames:
+            archive.write(filename, os.path.basename(filename))
+
+
+def folder_size(path):
+    return sum(os.path.getsize(os.path.join(dirpath, file)) for dirpath, _, files in os.walk(path) for file in files)
+
+
+def drop_cache(path):
+    if not hasattr(os, 'posix_fadvise'):
+        return
+    for dirpath, _, files in os.walk(path):
+        for file in files:
+            fd = os.open(os.path.join(dirpath, file), os.O_RDONLY)
+            try:
+                os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_DONTNEED)
+            finally:
+                os.close(fd)
+
+
+def measure(path, mode, workers, trials, cold):
+    times = []
+    for _ in range(trials):
+        if cold:
+            drop_cache(path)
+        start = time.perf_counter()
+        result = compute_volatilities(path, mode=mode, workers=workers)
+        times.append(time.perf_counter() - start)
+    return statistics.median(times), (list(result.top().items()), list(result.bottom().items()),
+                                      result.zero_volatilities)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--files', type=int, default=200)
+    parser.add_argument('--rows', type=int, default=20000)
+    parser.add_argument('--mode', choices=['serial', 'thread', 'pool'], default='pool')
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--trials', type=int, default=3)
+    parser.add_argument('--cold', action='store_true', help='вытеснять файлы из страничного кэша перед прогоном')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as path:
+        plain = os.path.join(path, 'csv')
+        filenames = generate_trades(plain, files=args.files, rows=args.rows)
+        make_gzip(filenames, os.path.join(path, 'gz'))
+        make_zip(filenames, os.path.join(path, 'zip'))
+
+        print('процессоров: %d, режим: %s, файлов: %d, кэш: %s' % (os.cpu_count(), args.mode, args.files,
+                                                                  'холодный' if args.cold else 'тёплый'))
+        reference = None
+        for name in ('csv', 'gz', 'zip'):
+            folder = os.path.join(path, name)
+            size = folder_size(folder)
+            elapsed, report = measure(folder, args.mode, args.workers, args.trials, args.cold)
+            if reference is None:
+                reference = size, elapsed, report
+                bound = ''
+            elif elapsed > reference[1]:
+                # при скорости диска B: size / B + elapsed = reference_size / B + reference_elapsed
+                bound = 'выгоднее при диске медленнее %.0f МБ/с' % (
+                    (reference[0] - size) / (elapsed - reference[1]) / 1024 / 1024)
+            else:
+                bound = 'быстрее при любом диске'
+            print('%-4s %8.1f МБ  %7.3f с  %s  %s' % (name, size / 1024 / 1024, elapsed,
+                                                       'совпадает' if report == reference[2] else 'ОТЛИЧАЕТСЯ', bound))
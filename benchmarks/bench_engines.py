@@ -0,0 +1,54 @@
+# -*- coding: utf-8 -*-
+
+# Сравнение движков чтения на файлах из trades: строк в секунду и совпадение результатов до бита.
+#   python -m benchmarks.bench_engines [trades] [--repeat 3]
+import argparse
+import os
+import time
+
+from volatility import engines
+
+
+def list_files(path):
+    files = []
+    for dirpath, dirnames, filenames in os.walk(path):
+        for file in filenames:
+            files.append(os.path.join(dirpath, file))
+    return sorted(files)
+
+
+def measure(engine, files, repeat):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        results = [engine(file) for file in files]
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, results
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('path', nargs='?', default='trades')
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    files = list_files(args.path)
+    reference = None
+    for name in engines.ENGINES:
+        if name == 'binary':
+            # двоичный формат сравнивается с CSV в bench_binary
+            continue
+        try:
+            engine = engines.get_engine(name)
+        except ImportError as exc:
+            print('%-8s пропущен: %s' % (name, exc))
+            continue
+        elapsed, results = measure(engine, files, args.repeat)
+        rows = sum(result[3] for result in results)
+        if reference is None:
+            reference = results
+        same = all(ours[:3] == theirs[:3] and ours[1].hex() == theirs[1].hex() and ours[2].hex() == theirs[2].hex()
+                   for ours, theirs in zip(results, reference))
+        print('%-8s %8.3f с %12.0f строк/с  %s' % (name, elapsed, rows / elapsed,
+                                                   'совпадает' if same else 'ОТЛИЧАЕТСЯ'))
@@ -0,0 +1,57 @@
+# -*- coding: utf-8 -*-
+
+# Память и скорость движков на больших сгенерированных файлах.
+# Каждый замер идёт в отдельном процессе, чтобы пиковый RSS не наследовался от предыдущего.
+#   python -m benchmarks.bench_mmap --rows 1000000 4000000
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+
+from benchmarks.datagen import write_ticker
+from volatility import engines
+
+CHILD = '''
+import json, resource, sys, time
+from volatility import engines
+start = time.perf_counter()
+result = engines.get_engine(sys.argv[1])(sys.argv[2])
+elapsed = time.perf_counter() - start
+print(json.dumps({'elapsed': elapsed, 'rows': result[3],
+                  'maxrss': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss}))
+'''
+
+
+def measure(engine, filename):
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    output = subprocess.run([sys.executable, '-c', CHILD, engine, filename], check=True, cwd=root,
+                            stdout=subprocess.PIPE, universal_newlines=True).stdout
+    return json.loads(output)
+
+
+if __name__ == '__main__':
+    import random
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--rows', type=int, nargs='+', default=[500000, 2000000])
+    # двоичный формат читает только .vol, а здесь файл CSV - он сравнивается с CSV в bench_binary
+    parser.add_argument('--engines', nargs='+', default=[name for name in engines.ENGINES if name != 'binary'])
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as path:
+        print('%-8s %10s %8s %10s %14s %12s' % ('движок', 'строк', 'МБ', 'время, с', 'строк/с', 'пик RSS, МБ'))
+        for rows in args.rows:
+            filename = os.path.join(path, 'TICKER_BIG.csv')
+            write_ticker(filename, 'BIG', rows, random.Random(rows))
+            size = os.path.getsize(filename) / 1024 / 1024
+            for engine in args.engines:
+                try:
+                    engines.get_engine(engine)
+                except ImportError:
+                    continue
+                result = measure(engine, filename)
+                print('%-8s %10d %8.1f %10.3f %14.0f %12.1f' % (engine, rows, size, result['elapsed'],
+                                                                 result['rows'] / result['elapsed'],
+                                                                 result['maxrss'] / 1024))
@@ -0,0 +1,45 @@
+# -*- coding: utf-8 -*-
+
+# Сравнение режимов 03_volatility_with_processes.py: процесс на файл против пула.
+#   python -m benchmarks.bench_pool --files 5000 --rows 50
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+from benchmarks.datagen import generate_trades
+
+SCRIPT = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), '03_volatility_with_processes.py')
+
+
+def run_script(path, *args):
+    start = time.perf_counter()
+    output = subprocess.run([sys.executable, SCRIPT, path] + list(args), check=True, stdout=subprocess.PIPE,
+                            universal_newlines=True).stdout
+    elapsed = time.perf_counter() - start
+    # последняя строка - волатильности и время работы, время отрезаем
+    report = output.splitlines()[-9:]
+    report[-1] = report[-1].rsplit(', ', 1)[0]
+    return elapsed, report
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--files', type=int, default=2000)
+    parser.add_argument('--rows', type=int, default=50)
+    parser.add_argument('--workers', type=int, default=None)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as path:
+        generate_trades(path, files=args.files, rows=args.rows)
+        workers = ['--workers', str(args.workers)] if args.workers else []
+        process_time, process_report = run_script(path, '--mode', 'process')
+        pool_time, pool_report = run_script(path, '--mode', 'pool', *workers)
+
+    print('файлов: %d, строк в файле: %d' % (args.files, args.rows))
+    print('процесс на файл: %.2f с' % process_time)
+    print('пул процессов:   %.2f с' % pool_time)
+    print('ускорение: %.1fx' % (process_time / pool_time))
+    print('вывод совпадает' if process_report == pool_report else 'ВЫВОД ОТЛИЧАЕТСЯ')
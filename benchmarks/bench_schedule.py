@@ -0,0 +1,67 @@
+# -*- coding: utf-8 -*-
+
+# Порядок задач пула на перекошенном наборе: файлы в порядке папки против LPT (крупные первыми, мелкие пачками).
+# Для каждого порядка - фактическое время (makespan) и занятость каждого процесса по замерам instrument.
+# Фактическое время зависит от числа ядер машины, поэтому рядом выводится расчётный makespan:
+# по времени каждого файла из последовательного прогона задачи раздаются освободившимся процессам по очереди.
+#   python -m benchmarks.bench_schedule --files 400 --rows 2000 --skew 1.2 --workers 4 [--big-last]
+import argparse
+import heapq
+import os
+import tempfile
+
+from benchmarks.datagen import generate_trades
+from volatility.api import SCHEDULES, compute_volatilities, list_tickers, plan_batches
+from volatility.instrument import Instrumentation
+
+
+def simulate(batches, costs, workers):
+    # свободный процесс забирает следующую задачу - как imap_unordered с chunksize=1
+    finish = [0.0] * workers
+    for batch in batches:
+        heapq.heapreplace(finish, finish[0] + sum(costs[ticker] for _, ticker in batch))
+    return max(finish)
+
+
+def run_schedule(tickers, schedule, workers, engine):
+    instrument = Instrumentation()
+    result = compute_volatilities(tickers, engine=engine, mode='pool', workers=workers, schedule=schedule,
+                                  instrument=instrument)
+    return result, instrument.report()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--files', type=int, default=400)
+    parser.add_argument('--rows', type=int, default=2000)
+    parser.add_argument('--skew', type=float, default=1.2)
+    parser.add_argument('--workers', type=int, default=4)
+    parser.add_argument('--engine', default='auto')
+    parser.add_argument('--big-last', action='store_true', help='файлы по возрастанию размера - крупнейший в самом конце')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as path:
+        generate_trades(path, files=args.files, rows=args.rows, skew=args.skew)
+        tickers = list_tickers(path)
+        if args.big_last:
+            tickers.sort(key=os.path.getsize)
+        serial = Instrumentation()
+        compute_volatilities(tickers, engine=args.engine, mode='serial', instrument=serial)
+        costs = {record['file']: record['end'] - record['start'] for record in serial.files}
+        sizes = sorted((os.path.getsize(ticker) for ticker in tickers), reverse=True)
+        print('процессоров: %d, процессов пула: %d, файлов: %d, крупнейший: %.1f КБ, медиана: %.1f КБ' % (
+            os.cpu_count(), args.workers, len(tickers), sizes[0] / 1024, sizes[len(sizes) // 2] / 1024))
+        print('последовательно: %.3f с, нижняя граница makespan: %.3f с' % (
+            sum(costs.values()), max(sum(costs.values()) / args.workers, max(costs.values()))))
+
+        reference = None
+        for schedule in SCHEDULES:
+            batches = plan_batches(tickers, args.workers, schedule=schedule)
+            result, report = run_schedule(tickers, schedule, args.workers, args.engine)
+            busy = sorted((worker['busy'] for worker in report['workers'].values()), reverse=True)
+            report_items = (list(result.top().items()), list(result.bottom().items()), result.zero_volatilities)
+            reference = reference or report_items
+            print('%-6s задач: %4d  расчётный makespan: %.3f с  фактический: %.3f с  занятость процессов: %s  %s' % (
+                schedule, len(batches), simulate(batches, costs, args.workers), report['wall'],
+                ' '.join('%.3f' % value for value in busy),
+                'совпадает' if report_items == reference else 'ОТЛИЧАЕТСЯ'))
@@ -0,0 +1,36 @@
+# -*- coding: utf-8 -*-
+
+# Очередь против таблицы в разделяемой памяти на большом числе маленьких файлов.
+#   python -m benchmarks.bench_shm --files 10000 --process-files 1000
+import argparse
+import tempfile
+import time
+
+from benchmarks.datagen import generate_trades
+from volatility.api import compute_volatilities
+
+
+def measure(tickers, mode, transport, workers):
+    start = time.perf_counter()
+    result = compute_volatilities(tickers, mode=mode, transport=transport, workers=workers)
+    elapsed = time.perf_counter() - start
+    return elapsed, result
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--files', type=int, default=10000)
+    parser.add_argument('--rows', type=int, default=20)
+    parser.add_argument('--process-files', type=int, default=1000,
+                        help='сколько файлов брать для режима "процесс на файл"')
+    parser.add_argument('--workers', type=int, default=None)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as path:
+        tickers = generate_trades(path, files=args.files, rows=args.rows)
+        for mode, files in (('pool', tickers), ('process', tickers[:args.process_files])):
+            queue_time, queue_result = measure(files, mode, 'queue', args.workers)
+            shm_time, shm_result = measure(files, mode, 'shm', args.workers)
+            same = queue_result.prices == shm_result.prices
+            print('%-8s файлов: %6d  очередь: %6.2f с  разделяемая память: %6.2f с  %s' % (
+                mode, len(files), queue_time, shm_time, 'совпадает' if same else 'ОТЛИЧАЕТСЯ'))
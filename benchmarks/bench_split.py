@@ -0,0 +1,37 @@
+# -*- coding: utf-8 -*-
+
+# Перекошенный набор: один огромный файл и много маленьких.
+# Сравнивается пул без деления файлов и пул, который режет крупный файл на части.
+#   python -m benchmarks.bench_split --big-rows 3000000 --files 500 --split-size 8388608
+import argparse
+import os
+import random
+import tempfile
+
+from benchmarks.bench_pool import run_script
+from benchmarks.datagen import generate_trades, write_ticker
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--big-rows', type=int, default=3000000)
+    parser.add_argument('--files', type=int, default=500)
+    parser.add_argument('--rows', type=int, default=1000)
+    parser.add_argument('--split-size', type=int, default=8 * 1024 * 1024)
+    parser.add_argument('--workers', type=int, default=None)
+    # части файла всегда читаются mmap-движком, поэтому по умолчанию сравниваем на нём же
+    parser.add_argument('--engine', default='mmap')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as path:
+        generate_trades(path, files=args.files, rows=args.rows)
+        write_ticker(os.path.join(path, 'TICKER_BIG9.csv'), 'BIG9', args.big_rows, random.Random(0))
+        size = os.path.getsize(os.path.join(path, 'TICKER_BIG9.csv')) / 1024 / 1024
+        options = ['--mode', 'pool', '--engine', args.engine] + (['--workers', str(args.workers)] if args.workers else [])
+        whole_time, whole_report = run_script(path, *options + ['--split-size', '0'])
+        split_time, split_report = run_script(path, *options + ['--split-size', str(args.split_size)])
+
+    print('процессоров: %d, большой файл: %.1f МБ, маленьких файлов: %d' % (os.cpu_count(), size, args.files))
+    print('без деления: %.2f с' % whole_time)
+    print('с делением:  %.2f с' % split_time)
+    print('ускорение: %.1fx' % (whole_time / split_time))
+    print('вывод совпадает' if whole_report == split_report else 'ВЫВОД ОТЛИЧАЕТСЯ')
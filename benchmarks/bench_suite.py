@@ -0,0 +1,171 @@
+# -*- coding: utf-8 -*-
+
+# Воспроизводимое сравнение всех способов подсчёта на синтетическом наборе из benchmarks.datagen.
+# Каждый прогон идёт в отдельном интерпретаторе: время меряется только вокруг compute_volatilities,
+# без запуска Python и импортов, а пик RSS берётся по самому процессу и по его дочерним процессам.
+# Итог - таблица медиан и JSON для отслеживания регрессий между версиями.
+#   python -m benchmarks.bench_suite --files 200 --rows 5000 --skew 1 --trials 5 --json bench.json
+import argparse
+import hashlib
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+try:
+    import resource
+except ImportError:
+    resource = None
+
+from benchmarks.datagen import generate_trades
+
+ENGINES = ('python', 'fast', 'numpy', 'mmap')
+# имя прогона -> параметры compute_volatilities; движок подставляется отдельно
+CASES = (
+    ('serial', {'mode': 'serial'}),
+    ('thread', {'mode': 'thread'}),
+    ('process', {'mode': 'process'}),
+    ('process-shm', {'mode': 'process', 'transport': 'shm'}),
+    ('pool', {'mode': 'pool'}),
+    ('pool-shm', {'mode': 'pool', 'transport': 'shm'}),
+)
+
+
+def peak_rss():
+    # ru_maxrss в Linux - в килобайтах, в macOS - в байтах
+    if resource is None:
+        return None
+    scale = 1 if sys.platform == 'darwin' else 1024
+    return max(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+               resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss) * scale
+
+
+def run_case(path, options):
+    # выполняется в дочернем интерпретаторе
+    options = dict(options)
+    if options.pop('asyncio', False):
+        from volatility.aio import compute_volatilities
+    else:
+        from volatility.api import compute_volatilities
+    start = time.perf_counter()
+    result = compute_volatilities(path, **options)
+    elapsed = time.perf_counter() - start
+    report = [list(result.top().items()), list(result.bottom().items()), result.zero_volatilities]
+    return {
+        'elapsed': elapsed,
+        'rows': sum(prices[3] for prices in result.prices.values()),
+        'files': len(result.prices),
+        'peak_rss': peak_rss(),
+        'digest': hashlib.sha1(json.dumps(report).encode('utf-8')).hexdigest(),
+    }
+
+
+def spawn_case(path, options):
+    output = subprocess.run([sys.executable, '-m', 'benchmarks.bench_suite', path, '--run', json.dumps(options)],
+                            check=True, stdout=subprocess.PIPE, universal_newlines=True).stdout
+    return json.loads(output.splitlines()[-1])
+
+
+def make_cases(modes, engines):
+    cases = []
+    for name, options in CASES:
+        if name not in modes:
+            continue
+        for engine in engines:
+            cases.append(('%s/%s' % (name, engine), dict(options, engine=engine)))
+    if 'asyncio' in modes:
+        cases.append(('asyncio', {'asyncio': True}))
+    return cases
+
+
+def available(engine):
+    from volatility import engines
+    try:
+        engines.get_engine(engine)
+    except ImportError as exc:
+        print('%-8s пропущен: %s' % (engine, exc))
+        return False
+    return True
+
+
+def benchmark(path, cases, trials):
+    results = []
+    reference = None
+    for name, options in cases:
+        runs = [spawn_case(path, options) for _ in range(trials)]
+        times = [run['elapsed'] for run in runs]
+        median = statistics.median(times)
+        rows = runs[0]['rows']
+        rss = [run['peak_rss'] for run in runs if run['peak_rss'] is not None]
+        if reference is None:
+            reference = runs[0]['digest']
+        results.append({
+            'name': name,
+            'options': options,
+            'times': times,
+            'median': median,
+            'min': min(times),
+            'rows': rows,
+            'rows_per_sec': rows / median if median else 0,
+            'peak_rss': max(rss) if rss else None,
+            'same': all(run['digest'] == reference for run in runs),
+        })
+        print_row(results[-1])
+    return results
+
+
+def print_header():
+    print('%-20s %9s %9s %13s %10s  %s' % ('прогон', 'медиана,с', 'мин,с', 'строк/с', 'пик RSS,МБ', 'итог'))
+
+
+def print_row(case):
+    rss = '%10.1f' % (case['peak_rss'] / 1024 / 1024) if case['peak_rss'] is not None else '%10s' % '-'
+    print('%-20s %9.3f %9.3f %13.0f %s  %s' % (case['name'], case['median'], case['min'], case['rows_per_sec'], rss,
+                                              'совпадает' if case['same'] else 'ОТЛИЧАЕТСЯ'))
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('data', nargs='?', default=None,
+                        help='готовая папка со сделками; без неё набор генерируется во временную папку')
+    parser.add_argument('--files', type=int, default=200)
+    parser.add_argument('--rows', type=int, default=2000, help='среднее число сделок в файле')
+    parser.add_argument('--skew', type=float, default=0, help='перекос размеров файлов, 0 - все одинаковые')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--trials', type=int, default=3)
+    parser.add_argument('--modes', nargs='+', default=[name for name, _ in CASES] + ['asyncio'],
+                        choices=[name for name, _ in CASES] + ['asyncio'])
+    parser.add_argument('--engines', nargs='+', default=list(ENGINES), choices=ENGINES)
+    parser.add_argument('--json', default=None, help='куда записать результаты в JSON')
+    parser.add_argument('--run', default=None, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.run is not None:
+        print(json.dumps(run_case(args.data, json.loads(args.run))))
+        sys.exit()
+
+    cases = make_cases(args.modes, [engine for engine in args.engines if available(engine)])
+    with tempfile.TemporaryDirectory() as temp:
+        path = args.data
+        if path is None:
+            path = temp
+            generate_trades(path, files=args.files, rows=args.rows, seed=args.seed, skew=args.skew)
+        print('процессоров: %d, файлов: %d, прогонов на случай: %d' % (
+            os.cpu_count(), sum(len(files) for _, _, files in os.walk(path)), args.trials))
+        print_header()
+        results = benchmark(path, cases, args.trials)
+
+    if args.json:
+        with open(args.json, 'w') as report:
+            json.dump({
+                'params': {'data': args.data, 'files': args.files, 'rows': args.rows, 'skew': args.skew,
+                           'seed': args.seed, 'trials': args.trials},
+                'python': platform.python_version(),
+                'platform': platform.platform(),
+                'cpu_count': os.cpu_count(),
+                'cases': results,
+            }, report, ensure_ascii=False, indent=2)
@@ -0,0 +1,92 @@
+# -*- coding: utf-8 -*-
+
+# Генератор синтетических данных в формате папки trades:
+#   SECID,TRADETIME,PRICE,QUANTITY
+# Данные детерминированы - одинаковый seed даёт побайтно одинаковые файлы.
+#   python -m benchmarks.datagen trades_synth --files 1000 --rows 2000 --skew 1.0
+#   python -m benchmarks.datagen history --days 20 --files 100   # по подпапке на торговый день
+import datetime
+import argparse
+import os
+import random
+import string
+
+
+def make_secid(index):
+    letters = string.ascii_uppercase
+    secid = ''
+    while True:
+        index, rest = divmod(index, len(letters))
+        secid = letters[rest] + secid
+        if not index:
+            break
+    return 'S' + secid + '9'
+
+
+def write_ticker(path, secid, rows, rnd, flat=False):
+    price = rnd.uniform(10, 1000)
+    seconds = 10 * 3600
+    with open(path, 'w') as ticker:
+        ticker.write('SECID,TRADETIME,PRICE,QUANTITY\n')
+        for _ in range(rows):
+            if not flat:
+                price = max(price * (1 + rnd.gauss(0, 0.002)), 0.01)
+            seconds = (seconds + rnd.randint(0, 3)) % 86400
+            ticker.write('%s,%02d:%02d:%02d,%.4f,%d\n' % (secid, seconds // 3600, seconds // 60 % 60, seconds % 60,
+                                                          price, rnd.randint(1, 100)))
+
+
+def skewed_rows(files, rows, skew, rnd):
+    # skew=0 - во всех файлах по rows строк; чем больше skew, тем сильнее размеры расходятся по степенному закону
+    # (i-й по величине файл пропорционален 1 / i ** skew), а среднее остаётся около rows
+    if not skew:
+        return [rows] * files
+    weights = [1 / (index + 1) ** skew for index in range(files)]
+    scale = rows * files / sum(weights)
+    sizes = [max(int(weight * scale), 1) for weight in weights]
+    rnd.shuffle(sizes)
+    return sizes
+
+
+def generate_trades(path, files=100, rows=1000, seed=0, zero_share=0.1, skew=0):
+    os.makedirs(path, exist_ok=True)
+    rnd = random.Random(seed)
+    sizes = skewed_rows(files, rows, skew, rnd)
+    filenames = []
+    for index in range(files):
+        secid = make_secid(index)
+        filename = os.path.join(path, 'TICKER_%s.csv' % secid)
+        write_ticker(filename, secid, sizes[index], rnd, flat=rnd.random() < zero_share)
+        filenames.append(filename)
+    return filenames
+
+
+def generate_sessions(path, days=5, first_day=datetime.date(2019, 1, 10), seed=0, **options):
+    # подпапка на каждый рабочий день, тикеры во всех днях одни и те же
+    filenames = []
+    day = first_day
+    for index in range(days):
+        while day.weekday() >= 5:
+            day += datetime.timedelta(days=1)
+        filenames.extend(generate_trades(os.path.join(path, day.isoformat()), seed=seed + index, **options))
+        day += datetime.timedelta(days=1)
+    return filenames
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('path')
+    parser.add_argument('--files', type=int, default=100)
+    parser.add_argument('--rows', type=int, default=1000, help='среднее число сделок в файле')
+    parser.add_argument('--skew', type=float, default=0, help='перекос размеров файлов, 0 - все одинаковые')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--zero-share', type=float, default=0.1, help='доля тикеров с неизменной ценой')
+    parser.add_argument('--days', type=int, default=0, help='сколько торговых дней, 0 - одна папка без дней')
+    args = parser.parse_args()
+
+    options = dict(files=args.files, rows=args.rows, seed=args.seed, zero_share=args.zero_share, skew=args.skew)
+    if args.days:
+        filenames = generate_sessions(args.path, days=args.days, **options)
+    else:
+        filenames = generate_trades(args.path, **options)
+    print('создано файлов:', len(filenames))
@@ -0,0 +1,137 @@
+# -*- coding: utf-8 -*-
+
+# Нагрузочный тест сервиса 08_volatility_service.py: несколько клиентов по постоянным соединениям
+# шлют вперемешку запросы top, bottom и zero, по каждому замеряется время ответа.
+# Без --port/--socket сервис запускается на время теста сам, на папке path.
+#   python -m benchmarks.load_service trades --clients 4 --requests 5000
+#   python -m benchmarks.load_service --port 8765 --clients 8
+#   python -m benchmarks.load_service trades --unix
+import argparse
+import http.client
+import itertools
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+SCRIPT = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), '08_volatility_service.py')
+QUERIES = (('top', 3), ('bottom', 3), ('zero', None), ('top', 10))
+
+
+class HTTPClient:
+
+    def __init__(self, port):
+        self.connection = http.client.HTTPConnection('127.0.0.1', port)
+        self.connection.connect()
+
+    def query(self, kind, n):
+        self.connection.request('GET', '/%s?n=%d' % (kind, n) if n is not None else '/' + kind)
+        response = self.connection.getresponse()
+        body = response.read()
+        if response.status != 200:
+            raise RuntimeError(body.decode('utf-8'))
+        return body
+
+    def close(self):
+        self.connection.close()
+
+
+class SocketClient:
+
+    def __init__(self, path):
+        self.socket = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.socket.connect(path)
+        self.reader = self.socket.makefile('rb')
+
+    def query(self, kind, n):
+        self.socket.sendall(('%s %d\n' % (kind, n) if n is not None else kind + '\n').encode('utf-8'))
+        return self.reader.readline()
+
+    def close(self):
+        self.reader.close()
+        self.socket.close()
+
+
+def run_client(make_client, requests, latencies):
+    client = make_client()
+    try:
+        for kind, n in itertools.islice(itertools.cycle(QUERIES), requests):
+            start = time.perf_counter()
+            client.query(kind, n)
+            latencies.append(time.perf_counter() - start)
+    finally:
+        client.close()
+
+
+def wait_ready(make_client, process, timeout=60):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if process is not None and process.poll() is not None:
+            raise RuntimeError('сервис завершился с кодом %d' % process.returncode)
+        try:
+            client = make_client()
+        except OSError:
+            time.sleep(0.1)
+            continue
+        client.close()
+        return
+    raise RuntimeError('сервис не ответил за %d с' % timeout)
+
+
+def free_port():
+    with socket.socket() as probe:
+        probe.bind(('127.0.0.1', 0))
+        return probe.getsockname()[1]
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('path', nargs='?', default='trades')
+    parser.add_argument('--port', type=int, default=None, help='уже запущенный сервис по HTTP')
+    parser.add_argument('--socket', default=None, help='уже запущенный сервис на Unix-сокете')
+    parser.add_argument('--unix', action='store_true', help='запустить свой сервис на Unix-сокете, а не по HTTP')
+    parser.add_argument('--clients', type=int, default=4)
+    parser.add_argument('--requests', type=int, default=2000, help='запросов на клиента')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as temp:
+        process = None
+        port, path = args.port, args.socket
+        if port is None and path is None:
+            if args.unix:
+                path = os.path.join(temp, 'volatility.sock')
+                options = ['--socket', path]
+            else:
+                port = free_port()
+                options = ['--port', str(port)]
+            process = subprocess.Popen([sys.executable, SCRIPT, args.path, '--interval', '1'] + options,
+                                       stdout=subprocess.DEVNULL)
+        make_client = (lambda: SocketClient(path)) if path else (lambda: HTTPClient(port))
+        try:
+            wait_ready(make_client, process)
+            # первый проход заполняет кэш готовых ответов
+            run_client(make_client, len(QUERIES), [])
+            latencies = []
+            clients = [threading.Thread(target=run_client, args=(make_client, args.requests, latencies))
+                       for _ in range(args.clients)]
+            start = time.perf_counter()
+            for client in clients:
+                client.start()
+            for client in clients:
+                client.join()
+            elapsed = time.perf_counter() - start
+        finally:
+            if process is not None:
+                process.terminate()
+                process.wait()
+
+    latencies.sort()
+    print('%s, клиентов: %d, запросов: %d' % ('Unix-сокет' if path else 'HTTP', args.clients, len(latencies)))
+    print('запросов в секунду: %.0f' % (len(latencies) / elapsed))
+    print('задержка, мс: медиана %.3f  p90 %.3f  p99 %.3f  максимум %.3f' % (
+        statistics.median(latencies) * 1000, latencies[int(len(latencies) * 0.9)] * 1000,
+        latencies[int(len(latencies) * 0.99)] * 1000, latencies[-1] * 1000))
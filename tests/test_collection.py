@@ -0,0 +1,47 @@
+# -*- coding: utf-8 -*-
+
+# Сбор результатов из отдельных процессов: процесс на файл должен завершаться быстро
+# и давать тот же отчёт, что и последовательный подсчёт.
+import threading
+import time
+
+from benchmarks.datagen import generate_trades
+from volatility.api import compute_volatilities
+
+
+def report(result):
+    return list(result.top().items()), list(result.bottom().items()), result.zero_volatilities, result.failed
+
+
+def test_process_mode_matches_serial(tmp_path):
+    generate_trades(str(tmp_path), files=20, rows=2000)
+    serial = compute_volatilities(str(tmp_path), mode='serial')
+    for transport in ('queue', 'shm'):
+        start = time.perf_counter()
+        result = compute_volatilities(str(tmp_path), mode='process', transport=transport)
+        elapsed = time.perf_counter() - start
+        assert elapsed < 1, '%s: %.3f с' % (transport, elapsed)
+        assert report(result) == report(serial)
+        assert not result.failed
+
+
+def test_process_mode_from_threads(tmp_path):
+    # из нескольких потоков сразу: процессы должны создаваться через forkserver, а не fork,
+    # иначе дочерний процесс может унаследовать чужую захваченную блокировку и зависнуть
+    generate_trades(str(tmp_path), files=10, rows=1000)
+    serial = report(compute_volatilities(str(tmp_path), mode='serial'))
+    results = {}
+
+    def run(name, transport):
+        results[name] = report(compute_volatilities(str(tmp_path), mode='process', transport=transport))
+
+    for _ in range(3):
+        threads = [threading.Thread(target=run, args=(index, transport), daemon=True)
+                   for index, transport in enumerate(('shm', 'shm', 'queue'))]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join(timeout=60)
+            assert not thread.is_alive()
+        assert list(results.values()) == [serial] * len(threads)
+        results.clear()
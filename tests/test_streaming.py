@@ -0,0 +1,61 @@
+# -*- coding: utf-8 -*-
+
+# Потоковый подсчёт после каждого дописывания, перезаписи и удаления файлов должен давать тот же отчёт,
+# что и полный пересчёт папки: тройки обновляются слиянием только по изменившимся тикерам.
+import os
+import random
+
+from benchmarks.datagen import generate_trades
+from volatility.api import compute_volatilities
+from volatility.streaming import StreamingVolatility
+
+
+def read_lines(filename):
+    with open(filename, 'r') as ticker:
+        return ticker.readlines()
+
+
+def append_rows(filename, rnd):
+    lines = read_lines(filename)
+    # у нового файла строк ещё нет - тикер берётся из имени TICKER_<SECID>.csv
+    secid = lines[-1].split(',')[0] if len(lines) > 1 else os.path.basename(filename)[len('TICKER_'):-len('.csv')]
+    with open(filename, 'a') as ticker:
+        for _ in range(rnd.randint(1, 20)):
+            ticker.write('%s,18:00:00,%.4f,1\n' % (secid, rnd.uniform(1, 2000)))
+
+
+def truncate_rows(filename, rnd):
+    lines = read_lines(filename)
+    with open(filename, 'w') as ticker:
+        ticker.writelines(lines[:rnd.randint(2, max(len(lines) - 1, 2))])
+
+
+def expected(path):
+    result = compute_volatilities(path, mode='serial')
+    return list(result.top().items()), list(result.bottom().items()), sorted(result.zero_volatilities)
+
+
+def test_matches_full_recount(tmp_path):
+    path = str(tmp_path)
+    filenames = generate_trades(path, files=12, rows=50, zero_share=0.3)
+    rnd = random.Random(1)
+    streaming = StreamingVolatility(path)
+    streaming.refresh()
+    assert streaming.report() == expected(path)
+    for step in range(200):
+        alive = [filename for filename in filenames if os.path.exists(filename)]
+        action = rnd.random()
+        if action < 0.7 and alive:
+            append_rows(rnd.choice(alive), rnd)
+        elif action < 0.85 and alive:
+            truncate_rows(rnd.choice(alive), rnd)
+        elif action < 0.92 and len(alive) > 3:
+            os.remove(rnd.choice(alive))
+        else:
+            filename = os.path.join(path, 'TICKER_N%03d.csv' % step)
+            with open(filename, 'w') as ticker:
+                ticker.write('SECID,TRADETIME,PRICE,QUANTITY\n')
+            append_rows(filename, rnd)
+            filenames.append(filename)
+        streaming.refresh()
+        assert streaming.report() == expected(path), step
@@ -0,0 +1,112 @@
+# -*- coding: utf-8 -*-
+
+# Конвейер на asyncio: чтение файлов крупными блоками и подсчёт крайних цен идут одновременно.
+#   читатели (не больше readers штук) -> ограниченная очередь блоков -> пул процессов
+# Читатели отдают блоки, выровненные по концу строки, а пул процессов считает по блоку (min, max, число сделок).
+# Когда очередь заполнена, читатели ждут - так объём прочитанных, но ещё не обработанных данных ограничен.
+import asyncio
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+from volatility.api import VolatilityResult, list_tickers, mp_context
+from volatility.archives import open_trades
+from volatility.engines import price_pattern
+
+CHUNK_SIZE = 4 * 1024 * 1024
+
+
+def chunk_prices(data, pattern):
+    prices = list(map(float, pattern.findall(data)))
+    if not prices:
+        return None, None, 0
+    return min(prices), max(prices), len(prices)
+
+
+async def read_file(filename, chunks, totals, chunk_size):
+    ticker = await asyncio.to_thread(open_trades, filename, 'rb')
+    try:
+        secid_index, pattern = price_pattern(await asyncio.to_thread(ticker.readline))
+        tail, last = b'', b''
+        while True:
+            block = await asyncio.to_thread(ticker.read, chunk_size)
+            if not block:
+                break
+            block = tail + block
+            cut = block.rfind(b'\n') + 1
+            tail = block[cut:]
+            if not cut:
+                continue
+            # тикер, как и в python_prices, берётся из последней строки файла
+            last = block[:cut].rstrip().rsplit(b'\n', 1)[-1] or last
+            totals.setdefault(filename, [None, None, None, 0])
+            await chunks.put((filename, pattern, block[:cut]))
+        if tail.strip():
+            last = tail.rstrip()
+            totals.setdefault(filename, [None, None, None, 0])
+            await chunks.put((filename, pattern, tail))
+        if last:
+            totals[filename][0] = last.split(b',')[secid_index].decode('ascii')
+    finally:
+        ticker.close()
+
+
+async def reader(files, chunks, totals, chunk_size, failed):
+    while files:
+        filename = files.pop()
+        try:
+            await read_file(filename, chunks, totals, chunk_size)
+        except Exception:
+            failed.add(filename)
+
+
+async def reducer(chunks, executor, totals, failed):
+    # ошибка в блоке помечает его файл упавшим, а не останавливает сборщик: иначе очередь перестала бы
+    # разбираться и читатели навсегда заснули бы на put
+    loop = asyncio.get_running_loop()
+    while True:
+        item = await chunks.get()
+        if item is None:
+            break
+        filename, pattern, data = item
+        if filename in failed:
+            continue
+        try:
+            min_price, max_price, rows = await loop.run_in_executor(executor, chunk_prices, data, pattern)
+        except Exception:
+            failed.add(filename)
+            continue
+        if not rows:
+            continue
+        total = totals[filename]
+        if total[1] is None or min_price < total[1]:
+            total[1] = min_price
+        if total[2] is None or max_price > total[2]:
+            total[2] = max_price
+        total[3] += rows
+
+
+async def compute_volatilities_async(paths, readers=4, workers=None, chunk_size=CHUNK_SIZE):
+    tickers = list_tickers(paths) if isinstance(paths, str) else list(paths)
+    workers = workers or os.cpu_count()
+    # в очереди лежит не больше двух блоков на процесс: память ограничена, а пул не простаивает
+    chunks = asyncio.Queue(maxsize=workers * 2)
+    totals = {}
+    failed = set()
+    files = list(reversed(tickers))
+    with ProcessPoolExecutor(max_workers=workers, mp_context=mp_context()) as executor:
+        reducers = [asyncio.create_task(reducer(chunks, executor, totals, failed)) for _ in range(workers * 2)]
+        try:
+            await asyncio.gather(*(reader(files, chunks, totals, chunk_size, failed) for _ in range(readers)))
+            for _ in reducers:
+                await chunks.put(None)
+            await asyncio.gather(*reducers)
+        finally:
+            for task in reducers:
+                task.cancel()
+    # упавшие файлы не попадают в prices и оказываются в VolatilityResult.failed
+    prices = {filename: tuple(total) for filename, total in totals.items() if total[3] and filename not in failed}
+    return VolatilityResult(prices, tickers)
+
+
+def compute_volatilities(paths, readers=4, workers=None, chunk_size=CHUNK_SIZE):
+    return asyncio.run(compute_volatilities_async(paths, readers=readers, workers=workers, chunk_size=chunk_size))
@@ -0,0 +1,511 @@
+# -*- coding: utf-8 -*-
+
+# Подсчёт волатильности как библиотека: compute_volatilities не хранит ничего между вызовами,
+# каждый вызов возвращает свой VolatilityResult, поэтому её можно звать из нескольких потоков сразу.
+#
+# Режимы выполнения повторяют учебные скрипты:
+#   serial  - файлы по очереди (01_volatility.py)
+#   thread  - пул потоков (02_volatility_with_threads.py)
+#   process - отдельный процесс на каждый файл (03_volatility_with_processes.py)
+#   pool    - пул процессов, крупные файлы делятся на части
+#
+# instrument - необязательный volatility.instrument.Instrumentation: если он передан, каждый файл
+# считается через instrument.measure и его замеры собираются в отчёт; без него замеров нет вовсе.
+import functools
+import multiprocessing
+import os
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+from concurrent.futures.process import BrokenProcessPool
+from multiprocessing.connection import wait
+
+from volatility import archives, engines, topk, windows
+from volatility.cache import VolatilityCache
+from volatility.instrument import measure
+from volatility.shm import ResultTable
+
+MODES = ('serial', 'thread', 'process', 'pool')
+# как результаты процессов попадают к родителю: через очередь или в таблицу в разделяемой памяти
+TRANSPORTS = ('queue', 'shm')
+# порядок задач пула: lpt - крупные файлы первыми, мелкие пачками; order - как в папке, по chunksize файлов
+SCHEDULES = ('lpt', 'order')
+# при lpt файлы меньше 1 / (процессов * BATCH_SHARE) общего объёма собираются в пачки примерно такого размера
+BATCH_SHARE = 8
+
+
+def list_tickers(path):
+    if not os.access(path, os.F_OK):
+        raise FileNotFoundError('Такой папки не существует: %s' % path)
+    tickers = []
+    for dirpath, dirnames, filenames in os.walk(path):
+        for file in filenames:
+            filename = os.path.join(dirpath, file)
+            # zip-архив раскрывается в список файлов внутри него
+            if archives.is_archive(filename):
+                tickers.extend(archives.list_members(filename))
+            else:
+                tickers.append(filename)
+    return tickers
+
+
+class TickerVolatility:
+
+    def __init__(self, filename, engine='auto', prices=None, measured=False, window=None):
+        self.filename = filename
+        self.engine = engine
+        self.prices = prices
+        self.measured = measured
+        # window=(интервал, скользящее окно) в секундах: вместе с ценами считается ряд волатильности по времени
+        self.window = window
+        self.record = None
+        self.series = None
+
+    def run(self):
+        if self.prices is None and self.window is not None:
+            self.series = windows.windowed_prices(self.filename, *self.window)
+            self.prices = self.series.prices
+        elif self.prices is None and self.measured:
+            self.prices, self.record = measure(engines.get_engine(self.engine), self.filename)
+        elif self.prices is None:
+            self.prices = engines.get_engine(self.engine)(self.filename)
+        self.secid, self.min_price, self.max_price, self.rows = self.prices
+        self.volatility = engines.price_volatility(self.min_price, self.max_price)
+        return self
+
+
+class TickerProcess:
+    # работа процесса на один файл; сам процесс создаётся из контекста mp_context():
+    # context.Process(target=TickerProcess(...).run)
+
+    def __init__(self, filename, connection=None, lock=None, engine='auto', table=None, index=None,
+                 measured=False):
+        self.filename = filename
+        self.connection = connection
+        self.lock = lock
+        self.engine = engine
+        self.table = table
+        self.index = index
+        self.measured = measured
+
+    def run(self):
+        if self.table is not None:
+            ticker = TickerVolatility(self.filename, engine=self.engine, measured=self.measured).run()
+            with ResultTable(name=self.table) as table:
+                table.write(self.index, ticker.prices, ticker.record)
+            return
+        # каждый процесс отправляет ровно одно сообщение, даже если упал -
+        # иначе сборщик не узнает, что ждать больше нечего
+        try:
+            ticker = TickerVolatility(self.filename, engine=self.engine, measured=self.measured).run()
+        except BaseException:
+            self.send([self.filename, None, None])
+            raise
+        self.send([self.filename, ticker.prices, ticker.record])
+
+    def send(self, message):
+        # пайп один на всех: под блокировкой сообщения разных процессов не перемешаются
+        with self.lock:
+            self.connection.send(message)
+
+
+class VolatilityResult:
+
+    def __init__(self, prices, tickers):
+        self.prices = prices
+        self.volatilities = OrderedDict()
+        self.zero_volatilities = []
+        self.failed = []
+        # результаты раскладываем в порядке файлов, а не в порядке их готовности
+        for ticker in tickers:
+            if ticker not in prices:
+                self.failed.append(ticker)
+                continue
+            secid, min_price, max_price, rows = prices[ticker]
+            volatility = engines.price_volatility(min_price, max_price)
+            if volatility == 0:
+                self.zero_volatilities.append(secid)
+            else:
+                self.volatilities[secid] = volatility
+        self.zero_volatilities.sort()
+
+    def top(self, n=3):
+        return topk.select(self.volatilities, n=n, reverse=True)
+
+    def bottom(self, n=3):
+        return topk.select(self.volatilities, n=n, reverse=False)
+
+
+def calc_prices(filename, engine='auto', measured=False):
+    # с measured=True возвращает пару (результат, замеры)
+    if measured:
+        return measure(engines.get_engine(engine), filename)
+    return engines.get_engine(engine)(filename)
+
+
+def calc_safe(filename, engine='auto', measured=False):
+    # файл, который не разобрался, не роняет подсчёт остальных: вместо результата None,
+    # и файл попадёт в VolatilityResult.failed
+    try:
+        return calc_prices(filename, engine, measured)
+    except Exception:
+        return None
+
+
+def calc_range(task, measured=False):
+    try:
+        if measured:
+            partial, record = measure(engines.range_prices, *task)
+            record['bytes'] = task[2] - task[1]
+            return partial, record
+        return engines.range_prices(*task)
+    except Exception:
+        return None
+
+
+worker_table = None
+
+
+def attach_table(name):
+    global worker_table
+    worker_table = ResultTable(name=name)
+
+
+def store_prices(index, filename, engine='auto', measured=False):
+    # упавший файл оставляет свою строку таблицы пустой
+    result = calc_safe(filename, engine, measured)
+    if result is None:
+        return
+    try:
+        if measured:
+            worker_table.write(index, *result)
+        else:
+            worker_table.write(index, result)
+    except ValueError:
+        # тикер не поместился в строку таблицы - строка остаётся пустой, файл попадёт в failed
+        pass
+
+
+def calc_batch(batch, engine='auto', measured=False):
+    return [(index, calc_safe(ticker, engine, measured)) for index, ticker in batch]
+
+
+def store_batch(batch, engine='auto', measured=False):
+    for index, ticker in batch:
+        store_prices(index, ticker, engine, measured)
+    return []
+
+
+def plan_batches(tickers, workers, chunksize=None, schedule='lpt'):
+    # задачи пула - списки (номер файла, файл)
+    indexed = list(enumerate(tickers))
+    if schedule == 'order':
+        if chunksize is None:
+            chunksize, extra = divmod(len(indexed), workers * 4)
+            chunksize += 1 if extra else 0
+        chunksize = max(chunksize, 1)
+        return [indexed[start:start + chunksize] for start in range(0, len(indexed), chunksize)]
+    # LPT: размеры известны заранее, крупные задачи уходят первыми, и свободный процесс берёт следующую
+    # по величине - самый большой файл не окажется в хвосте, когда остальные процессы уже простаивают
+    sizes = [archives.trades_size(ticker) for ticker in tickers]
+    indexed.sort(key=lambda item: sizes[item[0]], reverse=True)
+    limit = sum(sizes) / (workers * BATCH_SHARE)
+    batches, batch, batch_size = [], [], 0
+    for item in indexed:
+        size = sizes[item[0]]
+        if size >= limit:
+            batches.append([item])
+            continue
+        batch.append(item)
+        batch_size += size
+        if batch_size >= limit or len(batch) == chunksize:
+            batches.append(batch)
+            batch, batch_size = [], 0
+    if batch:
+        batches.append(batch)
+    return batches
+
+
+def add_record(instrument, filename, record, submitted=None):
+    record['file'] = filename
+    if submitted is not None:
+        # сколько задача пролежала в очереди пула, пока её не взял свободный процесс
+        record['queued'] = max(record['start'] - submitted, 0)
+    instrument.add(record)
+
+
+def mp_context():
+    # fork из процесса, где работают другие потоки, может унаследовать чужие захваченные блокировки
+    if threading.active_count() > 1 and 'forkserver' in multiprocessing.get_all_start_methods():
+        context = multiprocessing.get_context('forkserver')
+        # движки импортируются в forkserver один раз, а не в каждом порождённом процессе заново
+        context.set_forkserver_preload(['volatility.api'])
+        return context
+    return multiprocessing.get_context()
+
+
+def run_serial(tickers, engine='auto', instrument=None, **options):
+    prices = {}
+    for ticker in tickers:
+        result = calc_safe(ticker, engine, instrument is not None)
+        if result is None:
+            continue
+        if instrument is not None:
+            result, record = result
+            instrument.add(record)
+        prices[ticker] = result
+    return prices
+
+
+def run_threads(tickers, engine='auto', workers=None, instrument=None, **options):
+    measured = instrument is not None
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        results = list(executor.map(lambda ticker: calc_safe(ticker, engine, measured), tickers))
+    prices = {}
+    for ticker, result in zip(tickers, results):
+        if result is None:
+            continue
+        if measured:
+            result, record = result
+            instrument.add(record)
+        prices[ticker] = result
+    return prices
+
+
+def run_processes(tickers, engine='auto', transport='queue', instrument=None, **options):
+    if transport == 'shm':
+        return run_processes_shm(tickers, engine=engine, instrument=instrument)
+    context = mp_context()
+    reader, writer = context.Pipe(duplex=False)
+    lock = context.Lock()
+    processes = [context.Process(target=TickerProcess(ticker, writer, lock, engine=engine,
+                                                      measured=instrument is not None).run)
+                 for ticker in tickers]
+    for process in processes:
+        process.start()
+    writer.close()
+    prices = {}
+    # пайп вычитываем до join: процесс с непрочитанными данными в пайпе не завершится.
+    # Вместе с пайпом ждём завершения процессов: убитый сигналом процесс сообщения не отправит,
+    # и без этого сборщик ждал бы его вечно - такой файл попадёт в VolatilityResult.failed
+    running = {process.sentinel for process in processes}
+    try:
+        for _ in processes:
+            waited = time.perf_counter()
+            while running and not reader.poll():
+                running.difference_update(wait([reader] + list(running)))
+            if instrument is not None:
+                instrument.wait(time.perf_counter() - waited)
+            if not reader.poll():
+                # все процессы завершились, а сообщений больше нет
+                break
+            try:
+                ticker, result, record = reader.recv()
+            except EOFError:
+                break
+            # None - процесс упал, файл попадёт в VolatilityResult.failed
+            if result is not None:
+                prices[ticker] = result
+            if record is not None:
+                instrument.add(record)
+    finally:
+        reader.close()
+    for process in processes:
+        process.join()
+    return prices
+
+
+def run_processes_shm(tickers, engine='auto', instrument=None):
+    context = mp_context()
+    with ResultTable(len(tickers)) as table:
+        processes = [context.Process(target=TickerProcess(ticker, engine=engine, table=table.name, index=index,
+                                                          measured=instrument is not None).run)
+                     for index, ticker in enumerate(tickers)]
+        for process in processes:
+            process.start()
+        waited = time.perf_counter()
+        for process in processes:
+            process.join()
+        if instrument is not None:
+            instrument.wait(time.perf_counter() - waited)
+        prices = {}
+        for index, ticker in enumerate(tickers):
+            result = table.read(index)
+            if result:
+                prices[ticker] = result
+            record = table.read_record(index) if instrument is not None else None
+            if record:
+                add_record(instrument, ticker, record)
+        return prices
+
+
+def run_pool(tickers, engine='auto', workers=None, chunksize=None, split_size=None, transport='queue',
+             instrument=None, schedule='lpt', **options):
+    if not tickers:
+        return {}
+    workers = workers or os.cpu_count()
+    # файлы больше split_size режутся на части по строкам, части считаются в разных процессах
+    whole, ranges = [], []
+    for ticker in tickers:
+        if (split_size and not engines.is_binary(ticker) and not archives.is_compressed(ticker)
+                and os.path.getsize(ticker) > split_size):
+            ranges.extend((ticker, start, end) for start, end in engines.split_ranges(ticker, split_size))
+        else:
+            whole.append(ticker)
+    batches = plan_batches(whole, workers, chunksize=chunksize, schedule=schedule)
+    measured = instrument is not None
+    prices = {}
+    table = ResultTable(len(whole)) if transport == 'shm' else None
+    initializer, initargs = (attach_table, (table.name,)) if table else (None, ())
+    # пул процессов из concurrent.futures: если процесс пула убит, незавершённые задачи получают
+    # BrokenProcessPool, а не ждут его вечно, как в multiprocessing.Pool. Их файлы попадут в failed
+    broken = set()
+    try:
+        with ProcessPoolExecutor(max_workers=workers, mp_context=mp_context(), initializer=initializer,
+                                 initargs=initargs) as executor:
+            submitted = time.perf_counter()
+            # крупные части ставим в очередь первыми, чтобы они не оказались в хвосте
+            partials = [executor.submit(calc_range, task, measured) for task in ranges]
+            task = functools.partial(store_batch if table else calc_batch, engine=engine, measured=measured)
+            for future in as_completed([executor.submit(task, batch) for batch in batches]):
+                try:
+                    results = future.result()
+                except BrokenProcessPool:
+                    continue
+                for index, result in results:
+                    if result is None:
+                        continue
+                    if measured:
+                        result, record = result
+                        add_record(instrument, whole[index], record, submitted)
+                    prices[whole[index]] = result
+            if table:
+                for index, ticker in enumerate(whole):
+                    result = table.read(index)
+                    if result:
+                        prices[ticker] = result
+                    record = table.read_record(index) if measured else None
+                    if record:
+                        add_record(instrument, ticker, record, submitted)
+            done = []
+            for (ticker, _, _), future in zip(ranges, partials):
+                try:
+                    partial = future.result()
+                except BrokenProcessPool:
+                    partial = None
+                if partial is None:
+                    broken.add(ticker)
+                else:
+                    done.append((ticker, partial))
+    finally:
+        if table:
+            table.close()
+    # файл, у которого упала или пропала хоть одна часть, не считаем вовсе
+    done = [(ticker, partial) for ticker, partial in done if ticker not in broken]
+    if measured:
+        for ticker, (_, record) in done:
+            add_record(instrument, ticker, record, submitted)
+        done = [(ticker, partial) for ticker, (partial, _) in done]
+    merged = {}
+    for ticker, (min_price, max_price, rows) in done:
+        if not rows:
+            continue
+        if ticker in merged:
+            min_price = min(min_price, merged[ticker][0])
+            max_price = max(max_price, merged[ticker][1])
+            rows += merged[ticker][2]
+        merged[ticker] = min_price, max_price, rows
+    for ticker, (min_price, max_price, rows) in merged.items():
+        prices[ticker] = engines.read_secid(ticker), min_price, max_price, rows
+    return prices
+
+
+RUNNERS = {
+    'serial': run_serial,
+    'thread': run_threads,
+    'process': run_processes,
+    'pool': run_pool,
+}
+
+
+class WindowsResult:
+
+    def __init__(self, series, tickers):
+        # series - {SECID: windows.WindowedSeries}; файлы, которые не разобрались, - в failed, как у VolatilityResult
+        self.series = OrderedDict()
+        self.failed = []
+        for ticker, item in zip(tickers, series):
+            if item is None:
+                self.failed.append(ticker)
+            else:
+                self.series[item.secid] = item
+
+
+def calc_series(filename, window):
+    # как calc_safe: упавший файл (и файл без сделок) даёт None вместо ряда
+    try:
+        return TickerVolatility(filename, window=window).run().series
+    except Exception:
+        return None
+
+
+def calc_series_batch(batch, window):
+    return [(index, calc_series(ticker, window)) for index, ticker in batch]
+
+
+def compute_windows(paths, step=300, width=None, mode='pool', workers=None):
+    # ряды волатильности по времени для каждого тикера
+    tickers = list_tickers(paths) if isinstance(paths, str) else list(paths)
+    window = step, width
+    if mode == 'serial':
+        series = [calc_series(ticker, window) for ticker in tickers]
+    elif mode == 'thread':
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            series = list(executor.map(lambda ticker: calc_series(ticker, window), tickers))
+    elif mode == 'pool':
+        workers = workers or os.cpu_count()
+        series = [None] * len(tickers)
+        # как в run_pool: убитый процесс ломает пул, и файлы незавершённых задач попадают в failed
+        with ProcessPoolExecutor(max_workers=workers, mp_context=mp_context()) as executor:
+            futures = [executor.submit(calc_series_batch, batch, window) for batch in plan_batches(tickers, workers)]
+            for future in as_completed(futures):
+                try:
+                    results = future.result()
+                except BrokenProcessPool:
+                    continue
+                for index, item in results:
+                    series[index] = item
+    else:
+        raise ValueError('Неизвестный режим %s, доступны: serial, thread, pool' % mode)
+    return WindowsResult(series, tickers)
+
+
+def compute_volatilities(paths, engine='auto', mode='pool', workers=None, chunksize=None, split_size=None,
+                         cache_dir=None, verify_hash=False, transport='queue', instrument=None, schedule='lpt'):
+    # paths - папка с файлами сделок или список файлов
+    tickers = list_tickers(paths) if isinstance(paths, str) else list(paths)
+    if mode not in RUNNERS:
+        raise ValueError('Неизвестный режим %s, доступны: %s' % (mode, ', '.join(MODES)))
+    if transport not in TRANSPORTS:
+        raise ValueError('Неизвестный способ передачи %s, доступны: %s' % (transport, ', '.join(TRANSPORTS)))
+    if schedule not in SCHEDULES:
+        raise ValueError('Неизвестный порядок задач %s, доступны: %s' % (schedule, ', '.join(SCHEDULES)))
+    engines.check_engine(engine, tickers)
+    cache = VolatilityCache(cache_dir, verify_hash=verify_hash) if cache_dir else None
+    try:
+        prices = cache.load(tickers) if cache else {}
+        pending = [ticker for ticker in tickers if ticker not in prices]
+        computed = RUNNERS[mode](pending, engine=engine, workers=workers, chunksize=chunksize,
+                                 split_size=split_size, transport=transport, instrument=instrument,
+                                 schedule=schedule)
+        if cache:
+            cache.store(computed)
+            cache.evict(tickers)
+    finally:
+        if cache:
+            cache.close()
+    prices.update(computed)
+    if instrument is not None:
+        instrument.finish()
+    return VolatilityResult(prices, tickers)
@@ -0,0 +1,89 @@
+# -*- coding: utf-8 -*-
+
+# Чтение сжатых файлов сделок без распаковки на диск:
+#   trades/TICKER_AFH9.csv.gz                - файл, сжатый gzip
+#   trades/TICKER_AFH9.csv.zst               - файл, сжатый zstd (Python 3.14+ или пакет zstandard)
+#   archive/2019-01-10.zip/TICKER_AFH9.csv   - файл внутри zip-архива: путь архива, '/' и имя внутри архива
+# Распаковка идёт потоком в том процессе, который считает файл, поэтому в пуле архивы распаковываются
+# параллельно, а на диск читается только сжатый объём.
+import functools
+import gzip
+import io
+import os
+import zipfile
+
+try:
+    from compression import zstd
+except ImportError:
+    try:
+        import zstandard as zstd
+    except ImportError:
+        zstd = None
+
+GZIP_EXTENSION = '.gz'
+ZSTD_EXTENSION = '.zst'
+ZIP_EXTENSION = '.zip'
+
+
+def split_member(filename):
+    # 'archive/2019-01-10.zip/TICKER_AFH9.csv' -> ('archive/2019-01-10.zip', 'TICKER_AFH9.csv')
+    head, marker, member = filename.partition(ZIP_EXTENSION + '/')
+    if marker and member and os.path.isfile(head + ZIP_EXTENSION):
+        return head + ZIP_EXTENSION, member
+    return None, filename
+
+
+def is_archive(filename):
+    return filename.endswith(ZIP_EXTENSION)
+
+
+def is_compressed(filename):
+    return filename.endswith((GZIP_EXTENSION, ZSTD_EXTENSION)) or split_member(filename)[0] is not None
+
+
+def list_members(archive):
+    with zipfile.ZipFile(archive) as store:
+        return [archive + '/' + name for name in store.namelist() if not name.endswith('/')]
+
+
+def open_trades(filename, mode='r'):
+    # mode - 'r' для текста или 'rb' для байтов, как у open
+    archive, member = split_member(filename)
+    if archive is not None:
+        # член архива остаётся открытым и после закрытия ZipFile - файл архива закроется вместе с ним
+        with zipfile.ZipFile(archive) as store:
+            stream = store.open(member)
+        return stream if mode == 'rb' else io.TextIOWrapper(stream)
+    if filename.endswith(GZIP_EXTENSION):
+        return gzip.open(filename, 'rb' if mode == 'rb' else 'rt')
+    if filename.endswith(ZSTD_EXTENSION):
+        if zstd is None:
+            raise ImportError('Для файлов .zst нужен Python 3.14 или пакет zstandard')
+        return zstd.open(filename, 'rb' if mode == 'rb' else 'rt')
+    return open(filename, mode)
+
+
+def trades_stat(filename):
+    # у члена архива своих размера и времени изменения на диске нет - берутся у архива
+    archive, _ = split_member(filename)
+    return os.stat(archive or filename)
+
+
+@functools.lru_cache(maxsize=16)
+def member_sizes(archive, mtime):
+    # оглавление архива читается один раз на версию архива, а не на каждый его член
+    with zipfile.ZipFile(archive) as store:
+        return {info.filename: info.compress_size for info in store.infolist()}
+
+
+def trades_size(filename):
+    # сколько байт нужно прочитать с диска: для члена архива - его сжатый размер
+    archive, member = split_member(filename)
+    if archive is None:
+        return os.path.getsize(filename)
+    return member_sizes(archive, os.stat(archive).st_mtime_ns)[member]
+
+
+def trades_exists(filename):
+    archive, _ = split_member(filename)
+    return os.path.exists(archive or filename)
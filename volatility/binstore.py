@@ -0,0 +1,186 @@
+# -*- coding: utf-8 -*-
+
+# Колоночный двоичный формат файла сделок одного тикера.
+# CSV перечитывается и разбирается при каждом запуске, двоичный файл конвертируется один раз,
+# а дальше колонки читаются напрямую из отображённого в память файла без разбора и копирования.
+#
+# Формат (little-endian):
+#   заголовок 32 байта: b'VOLT', версия (uint16), размер заголовка (uint16), SECID (16 байт ascii),
+#                       число сделок (uint64)
+#   PRICE     float64 x N
+#   TRADETIME int32 x N - секунды от начала суток
+#   выравнивание до 8 байт
+#   QUANTITY  int64 x N
+#
+# Конвертация папки:
+#   python -m volatility.binstore trades trades_bin
+import argparse
+import array
+import mmap
+import os
+import struct
+import sys
+
+from volatility import archives
+from volatility.instrument import phases
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+MAGIC = b'VOLT'
+VERSION = 1
+# SECID длиннее поля struct молча обрезал бы - такой тикер не конвертируем
+SECID_SIZE = 16
+HEADER = struct.Struct('<4sHH%dsQ' % SECID_SIZE)
+EXTENSION = '.vol'
+
+
+def parse_time(value):
+    hours, minutes, seconds = value.split(':')
+    return int(hours) * 3600 + int(minutes) * 60 + int(seconds)
+
+
+def format_time(seconds):
+    return '%02d:%02d:%02d' % (seconds // 3600, seconds // 60 % 60, seconds % 60)
+
+
+def column_offsets(rows):
+    prices = HEADER.size
+    times = prices + 8 * rows
+    quantities = times + 4 * rows
+    quantities += -quantities % 8
+    return prices, times, quantities, quantities + 8 * rows
+
+
+def convert_csv(source, target):
+    prices, times, quantities = array.array('d'), array.array('i'), array.array('q')
+    secid = ''
+    with archives.open_trades(source) as ticker:
+        head = ticker.readline().rstrip().split(',')
+        secid_index, time_index = head.index('SECID'), head.index('TRADETIME')
+        price_index, quantity_index = head.index('PRICE'), head.index('QUANTITY')
+        for line in ticker:
+            data = line.rstrip().split(',')
+            if len(data) < len(head):
+                continue
+            secid = data[secid_index]
+            prices.append(float(data[price_index]))
+            times.append(parse_time(data[time_index]))
+            quantities.append(int(data[quantity_index]))
+    if sys.byteorder != 'little':
+        for column in prices, times, quantities:
+            column.byteswap()
+    encoded = secid.encode('ascii')
+    if len(encoded) > SECID_SIZE:
+        raise ValueError('Тикер %s в %s длиннее %d байт' % (secid, source, SECID_SIZE))
+    _, _, quantities_offset, _ = column_offsets(len(prices))
+    with open(target, 'wb') as store:
+        store.write(HEADER.pack(MAGIC, VERSION, HEADER.size, encoded, len(prices)))
+        store.write(prices.tobytes())
+        store.write(times.tobytes())
+        store.write(b'\0' * (quantities_offset - store.tell()))
+        store.write(quantities.tobytes())
+    return len(prices)
+
+
+def target_name(file):
+    # TICKER_AFH9.csv.gz -> TICKER_AFH9.vol
+    if file.endswith((archives.GZIP_EXTENSION, archives.ZSTD_EXTENSION)):
+        file = os.path.splitext(file)[0]
+    return os.path.splitext(file)[0] + EXTENSION
+
+
+def convert_tree(source, target):
+    # сжатые файлы читаются через archives.open_trades, а члены zip-архива раскладываются
+    # в папку с именем архива без .zip
+    converted = []
+    for dirpath, dirnames, filenames in os.walk(source):
+        folder = os.path.join(target, os.path.relpath(dirpath, source))
+        for file in filenames:
+            path = os.path.join(dirpath, file)
+            if archives.is_archive(path):
+                sources = [(member, os.path.join(folder, os.path.splitext(file)[0], member[len(path) + 1:]))
+                           for member in archives.list_members(path)]
+            else:
+                sources = [(path, os.path.join(folder, file))]
+            for member, name in sources:
+                filename = os.path.join(os.path.dirname(name), target_name(os.path.basename(name)))
+                os.makedirs(os.path.dirname(filename), exist_ok=True)
+                convert_csv(member, filename)
+                converted.append(filename)
+    return converted
+
+
+class TradeStore:
+    # колонки отдаются как представления над mmap: memoryview или numpy-массивы без копирования
+
+    def __init__(self, filename):
+        with open(filename, 'rb') as store:
+            self.buffer = mmap.mmap(store.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, header_size, secid, self.rows = HEADER.unpack_from(self.buffer)
+        if magic != MAGIC or version != VERSION:
+            self.buffer.close()
+            raise ValueError('%s не является файлом сделок версии %d' % (filename, VERSION))
+        self.secid = secid.rstrip(b'\0').decode('ascii')
+        self.offsets = column_offsets(self.rows)
+
+    def close(self):
+        self.buffer.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def column(self, index, code):
+        start, end = self.offsets[index], self.offsets[index] + struct.calcsize(code) * self.rows
+        if numpy is not None:
+            return numpy.frombuffer(self.buffer, dtype=numpy.dtype(code).newbyteorder('<'), count=self.rows,
+                                    offset=start)
+        if sys.byteorder == 'little':
+            return memoryview(self.buffer)[start:end].cast(code)
+        column = array.array(code, self.buffer[start:end])
+        column.byteswap()
+        return column
+
+    @property
+    def prices(self):
+        return self.column(0, 'd')
+
+    @property
+    def times(self):
+        return self.column(1, 'i')
+
+    @property
+    def quantities(self):
+        return self.column(2, 'q')
+
+
+def binary_prices(filename, timings=None):
+    phase = phases(timings)
+    with TradeStore(filename) as store:
+        if not store.rows:
+            raise ValueError('В файле %s нет сделок' % filename)
+        prices = store.prices
+        phase.mark('open')
+        if numpy is not None:
+            result = store.secid, float(prices.min()), float(prices.max()), store.rows
+        else:
+            result = store.secid, min(prices), max(prices), store.rows
+        # представления над mmap нужно отпустить до его закрытия
+        del prices
+    phase.mark('reduce')
+    return result
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('source', nargs='?', default='trades')
+    parser.add_argument('target', nargs='?', default='trades_bin')
+    args = parser.parse_args()
+
+    converted = convert_tree(args.source, args.target)
+    print('сконвертировано файлов:', len(converted))
@@ -0,0 +1,95 @@
+# -*- coding: utf-8 -*-
+
+# Кэш результатов разбора файлов сделок между запусками.
+# Для каждого файла хранится (тикер, минимальная цена, максимальная цена, число сделок) в SQLite-базе
+# в заданной папке. Запись считается актуальной, если у файла не изменились размер и время модификации.
+# С verify_hash=True дополнительно хранится хэш содержимого: если файл только "потрогали" (mtime другой,
+# а содержимое то же), запись используется повторно без пересчёта.
+# У файла внутри zip-архива своих отметок нет, поэтому размер и время изменения берутся у архива.
+import hashlib
+import os
+import sqlite3
+
+from volatility.archives import open_trades, trades_exists, trades_stat
+
+CACHE_FILENAME = 'volatility_cache.sqlite3'
+HASH_BLOCK = 1024 * 1024
+
+
+def content_hash(filename):
+    digest = hashlib.blake2b(digest_size=16)
+    with open_trades(filename, 'rb') as ticker:
+        for block in iter(lambda: ticker.read(HASH_BLOCK), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+class VolatilityCache:
+
+    def __init__(self, directory, verify_hash=False):
+        os.makedirs(directory, exist_ok=True)
+        self.verify_hash = verify_hash
+        self.stats = {}
+        self.connection = sqlite3.connect(os.path.join(directory, CACHE_FILENAME))
+        self.connection.execute('CREATE TABLE IF NOT EXISTS files (path TEXT PRIMARY KEY, size INTEGER, '
+                                'mtime INTEGER, hash TEXT, secid TEXT, min_price REAL, max_price REAL, rows INTEGER)')
+
+    def close(self):
+        self.connection.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def load(self, filenames):
+        entries = {path: row for path, *row in
+                   self.connection.execute('SELECT path, size, mtime, hash, secid, min_price, max_price, rows '
+                                           'FROM files')}
+        results = {}
+        touched = []
+        for filename in filenames:
+            # размер, время и хэш запоминаем до пересчёта: если файл изменится во время разбора,
+            # в кэш попадут старые отметки и следующий запуск пересчитает его ещё раз
+            stat = trades_stat(filename)
+            entry = entries.get(os.path.abspath(filename))
+            digest = None
+            if entry is not None and stat.st_size == entry[0]:
+                size, mtime, stored, secid, min_price, max_price, rows = entry
+                if stat.st_mtime_ns == mtime:
+                    results[filename] = secid, min_price, max_price, rows
+                    continue
+                if self.verify_hash and stored:
+                    digest = content_hash(filename)
+                    if digest == stored:
+                        touched.append((stat.st_mtime_ns, os.path.abspath(filename)))
+                        results[filename] = secid, min_price, max_price, rows
+                        continue
+            if self.verify_hash and digest is None:
+                digest = content_hash(filename)
+            self.stats[filename] = stat, digest
+        if touched:
+            with self.connection:
+                self.connection.executemany('UPDATE files SET mtime = ? WHERE path = ?', touched)
+        return results
+
+    def store(self, results):
+        rows = []
+        for filename, (secid, min_price, max_price, count) in results.items():
+            stat, digest = self.stats.pop(filename, None) or (
+                trades_stat(filename), content_hash(filename) if self.verify_hash else None)
+            rows.append((os.path.abspath(filename), stat.st_size, stat.st_mtime_ns, digest, secid, min_price,
+                         max_price, count))
+        with self.connection:
+            self.connection.executemany('INSERT OR REPLACE INTO files VALUES (?, ?, ?, ?, ?, ?, ?, ?)', rows)
+
+    def evict(self, filenames=()):
+        # удаляем записи о файлах, которых больше нет на диске
+        keep = {os.path.abspath(filename) for filename in filenames}
+        gone = [(path,) for path, in self.connection.execute('SELECT path FROM files')
+                if path not in keep and not trades_exists(path)]
+        if gone:
+            with self.connection:
+                self.connection.executemany('DELETE FROM files WHERE path = ?', gone)
+        return len(gone)
@@ -0,0 +1,74 @@
+# -*- coding: utf-8 -*-
+
+# Общие для учебных скриптов разбор аргументов и вывод результата.
+import argparse
+import cProfile
+import os
+import sys
+
+from volatility import engines
+from volatility.instrument import Instrumentation
+
+
+def make_parser(engine=True, cache=True, instrument=True, top=True, profile=True):
+    parser = argparse.ArgumentParser()
+    parser.add_argument('path', nargs='?', default='trades')
+    if engine:
+        parser.add_argument('--engine', choices=['auto'] + list(engines.ENGINES), default='auto')
+    if top:
+        parser.add_argument('--top', type=int, default=3, help='сколько тикеров выводить в каждой тройке')
+    if cache:
+        parser.add_argument('--cache-dir', default=None, help='папка для кэша результатов между запусками')
+        parser.add_argument('--verify-hash', action='store_true', help='сверять содержимое файлов по хэшу')
+    if instrument:
+        parser.add_argument('--report', default=None, help='записать замеры по файлам и процессам в JSON')
+    if profile:
+        parser.add_argument('--profile', default=None, help='записать профиль cProfile (читается через pstats)')
+    return parser
+
+
+def run_measured(args, compute):
+    # compute(instrument) - подсчёт; замеры и профиль включаются только флагами --report и --profile
+    instrument = Instrumentation() if getattr(args, 'report', None) else None
+    profiler = cProfile.Profile() if args.profile else None
+    if profiler:
+        profiler.enable()
+    try:
+        result = compute(instrument)
+    finally:
+        if profiler:
+            profiler.disable()
+            profiler.dump_stats(args.profile)
+    if instrument is not None:
+        instrument.dump(args.report)
+    return result
+
+
+def check_path(path):
+    if not os.access(path, os.F_OK):
+        raise BaseException('Такой папки не существует')
+
+
+def print_report(max_items, min_items, zero_volatilities):
+    print('Максимальная волатильность:')
+    for ticket, value in max_items:
+        print('\t', ticket, round(value, 2), '%')
+
+    print('Минимальная волатильность:')
+    for ticket, value in reversed(list(min_items)):
+        print('\t', ticket, round(value, 2), '%')
+
+    print('Нулевая волатильность:', end='\n\t')
+    for ticket in zero_volatilities:
+        print(ticket, end=', ')
+
+
+def exit_on_failed(failed):
+    # файл, который не разобрался, не должен молча выпадать из троек: перечисляем такие файлы
+    # в stderr и завершаемся с ненулевым кодом
+    if not failed:
+        return
+    print('Не удалось посчитать файлов: %d' % len(failed), file=sys.stderr)
+    for filename in failed:
+        print('\t', filename, file=sys.stderr)
+    sys.exit(1)
@@ -0,0 +1,263 @@
+# -*- coding: utf-8 -*-
+
+# Движки чтения файла сделок. Каждый движок возвращает (тикер, минимальная цена, максимальная цена, число сделок),
+# волатильность по крайним ценам считает price_volatility.
+# python, fast и numpy читают файл потоком и поэтому понимают и сжатые файлы (volatility.archives),
+# mmap отображает в память сам файл и работает только с несжатыми CSV.
+import mmap
+import os
+import re
+
+from volatility import archives, binstore
+from volatility.instrument import phases
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+
+def price_volatility(min_price, max_price):
+    half_sum = (max_price + min_price) / 2
+    return ((max_price - min_price) / half_sum) * 100
+
+
+def python_prices(filename, timings=None):
+    # разбор и сравнение идут в одном цикле, поэтому всё время цикла считается разбором
+    phase = phases(timings)
+    with archives.open_trades(filename) as ticker:
+        head = ticker.readline().rstrip().split(',')
+        phase.mark('open')
+        data = ticker.readline().rstrip().split(',')
+        row_dict = dict(zip(head, data))
+        row_dict['PRICE'] = float(row_dict['PRICE'])
+        max_price = row_dict['PRICE']
+        min_price = row_dict['PRICE']
+        rows = 1
+        for line in ticker:
+            data = line.rstrip().split(',')
+            row_dict = dict(zip(head, data))
+            row_dict['PRICE'] = float(row_dict['PRICE'])
+            if row_dict['PRICE'] > max_price:
+                max_price = row_dict['PRICE']
+            if row_dict['PRICE'] < min_price:
+                min_price = row_dict['PRICE']
+            rows += 1
+        phase.mark('parse')
+    return row_dict['SECID'], min_price, max_price, rows
+
+
+# сколько байт строк readlines отдаёт за раз
+FAST_BATCH = 1024 * 1024
+
+
+def fast_prices(filename, timings=None):
+    # строка режется не целиком, а только до колонки PRICE с ближнего к ней края (split/rsplit с maxsplit),
+    # одинаковые цены в файле повторяются часто, поэтому во float переводятся только различные строки цен
+    phase = phases(timings)
+    with archives.open_trades(filename) as ticker:
+        head = ticker.readline().rstrip().split(',')
+        secid_index, price_index = head.index('SECID'), head.index('PRICE')
+        after = len(head) - 1 - price_index
+        phase.mark('open')
+        min_price = max_price = last = None
+        rows = 0
+        while True:
+            lines = ticker.readlines(FAST_BATCH)
+            if not lines:
+                break
+            if after < price_index:
+                prices = {line.rsplit(',', after + 1)[1] for line in lines}
+            else:
+                prices = {line.split(',', price_index + 1)[price_index] for line in lines}
+            prices = list(map(float, prices))
+            phase.mark('parse')
+            low, high = min(prices), max(prices)
+            if min_price is None or low < min_price:
+                min_price = low
+            if max_price is None or high > max_price:
+                max_price = high
+            rows += len(lines)
+            last = lines[-1]
+            phase.mark('reduce')
+    if last is None:
+        raise ValueError('В файле %s нет сделок' % filename)
+    # тикер, как и в python_prices, берётся из последней строки
+    return last.rstrip().split(',')[secid_index], min_price, max_price, rows
+
+
+def remember_last(lines, last):
+    # сжатый поток с конца не прочитать - последнюю строку запоминаем по дороге
+    for line in lines:
+        last[0] = line
+        yield line
+
+
+def numpy_prices(filename, timings=None):
+    phase = phases(timings)
+    with archives.open_trades(filename) as ticker:
+        head = ticker.readline().rstrip().split(',')
+        compressed = archives.is_compressed(filename)
+        last = ['']
+        secid = None if compressed else read_secid(filename)
+        phase.mark('open')
+        prices = numpy.loadtxt(remember_last(ticker, last) if compressed else ticker, delimiter=',',
+                               usecols=head.index('PRICE'), dtype=numpy.float64, ndmin=1)
+        phase.mark('parse')
+    if compressed:
+        secid = last[0].rstrip().split(',')[head.index('SECID')]
+    result = secid, float(prices.min()), float(prices.max()), len(prices)
+    phase.mark('reduce')
+    return result
+
+
+# окно отображения файла в память - от него, а не от размера файла, зависит потребление памяти
+MMAP_WINDOW = 1024 * 1024
+
+
+def price_pattern(head):
+    # строка целиком не разбирается: регулярка пропускает колонки до PRICE и захватывает только её
+    fields = head.decode('ascii').rstrip().split(',')
+    return fields.index('SECID'), re.compile(rb'^' + rb'[^,\n]*,' * fields.index('PRICE') + rb'([^,\n]*)', re.M)
+
+
+def scan_prices(fileno, pattern, start, end, window=MMAP_WINDOW, phase=None):
+    phase = phase or phases(None)
+    min_price = max_price = None
+    rows = 0
+    while start < end:
+        base = start - start % mmap.ALLOCATIONGRANULARITY
+        length = min(base + window, end) - base
+        with mmap.mmap(fileno, length, access=mmap.ACCESS_READ, offset=base) as buffer:
+            if hasattr(buffer, 'madvise'):
+                buffer.madvise(mmap.MADV_SEQUENTIAL)
+            pos = start - base
+            stop = length
+            if base + length < end:
+                stop = buffer.rfind(b'\n', pos) + 1
+                if not stop:
+                    raise ValueError('Строка длиннее окна чтения %d байт' % window)
+            prices = list(map(float, pattern.findall(buffer, pos, stop)))
+        phase.mark('parse')
+        if prices:
+            low, high = min(prices), max(prices)
+            if min_price is None or low < min_price:
+                min_price = low
+            if max_price is None or high > max_price:
+                max_price = high
+            rows += len(prices)
+        phase.mark('reduce')
+        start = base + stop
+    return min_price, max_price, rows
+
+
+def mmap_prices(filename, timings=None):
+    if archives.is_compressed(filename):
+        raise ValueError('Движок mmap читает только несжатые файлы, а %s сжат' % filename)
+    phase = phases(timings)
+    with open(filename, 'rb') as ticker:
+        head = ticker.readline()
+        secid_index, pattern = price_pattern(head)
+        secid = last_secid(ticker, len(head), secid_index)
+        size = os.fstat(ticker.fileno()).st_size
+        phase.mark('open')
+        min_price, max_price, rows = scan_prices(ticker.fileno(), pattern, len(head), size, phase=phase)
+    if not rows:
+        raise ValueError('В файле %s нет сделок' % filename)
+    return secid, min_price, max_price, rows
+
+
+def last_line(ticker, start, end=None, block=64 * 1024):
+    # последняя непустая строка между позициями start и end (по умолчанию - конец файла):
+    # файл читается с конца блоками, а не целиком
+    position = os.fstat(ticker.fileno()).st_size if end is None else end
+    tail = b''
+    while position > start:
+        step = min(block, position - start)
+        position -= step
+        ticker.seek(position)
+        tail = ticker.read(step) + tail
+        data = tail.rstrip()
+        cut = data.rfind(b'\n')
+        if cut >= 0 or position == start:
+            return data[cut + 1:]
+    return b''
+
+
+def last_secid(ticker, start, secid_index, end=None):
+    # тикер, как и в python_prices, берётся из последней строки файла
+    line = last_line(ticker, start, end)
+    return line.split(b',')[secid_index].decode('ascii') if line else None
+
+
+def read_secid(filename):
+    with open(filename, 'rb') as ticker:
+        head = ticker.readline()
+        secid_index, _ = price_pattern(head)
+        return last_secid(ticker, len(head), secid_index)
+
+
+def split_ranges(filename, part_size):
+    # границы частей выровнены на начало строки, первая часть начинается сразу после заголовка
+    with open(filename, 'rb') as ticker:
+        bounds = [len(ticker.readline())]
+        size = os.fstat(ticker.fileno()).st_size
+        position = bounds[0] + part_size
+        while position < size:
+            ticker.seek(position - 1)
+            ticker.readline()
+            position = ticker.tell()
+            if position >= size:
+                break
+            bounds.append(position)
+            position += part_size
+        bounds.append(size)
+    return list(zip(bounds, bounds[1:]))
+
+
+def range_prices(filename, start, end, timings=None):
+    phase = phases(timings)
+    with open(filename, 'rb') as ticker:
+        _, pattern = price_pattern(ticker.readline())
+        phase.mark('open')
+        return scan_prices(ticker.fileno(), pattern, start, end, phase=phase)
+
+
+ENGINES = {
+    'python': python_prices,
+    'fast': fast_prices,
+    'numpy': numpy_prices,
+    'mmap': mmap_prices,
+    'binary': binstore.binary_prices,
+}
+
+
+def is_binary(filename):
+    return filename.endswith(binstore.EXTENSION)
+
+
+def auto_prices(filename, timings=None):
+    # двоичные файлы узнаём по расширению, для CSV берём самый быстрый из доступных движков
+    if is_binary(filename):
+        return binstore.binary_prices(filename, timings=timings)
+    return ENGINES['numpy' if numpy is not None else 'fast'](filename, timings=timings)
+
+
+def get_engine(name='auto'):
+    if name == 'auto':
+        return auto_prices
+    if name == 'numpy' and numpy is None:
+        raise ImportError('Для движка numpy нужен установленный numpy')
+    if name not in ENGINES:
+        raise ValueError('Неизвестный движок %s, доступны: %s' % (name, ', '.join(ENGINES)))
+    return ENGINES[name]
+
+
+def check_engine(name, filenames):
+    # движок binary на CSV упал бы на каждом файле, и все они молча оказались бы в failed
+    get_engine(name)
+    if name == 'binary':
+        text = [filename for filename in filenames if not is_binary(filename)]
+        if text:
+            raise ValueError('Движок binary читает только файлы %s, а %s - нет; сконвертируйте папку: '
+                             'python -m volatility.binstore' % (binstore.EXTENSION, text[0]))
@@ -0,0 +1,102 @@
+# -*- coding: utf-8 -*-
+
+# Замеры вместо построчных print: по каждому файлу - время открытия, разбора и свёртки в min/max,
+# строки и байты в секунду, ожидание результатов в очереди и загрузка каждого процесса.
+# По умолчанию замеры выключены: движки получают timings=None и вызывают пустой NO_PHASES.
+#
+# Время берётся из time.perf_counter - на Linux это CLOCK_MONOTONIC, общий для всех процессов машины,
+# поэтому отметки из разных процессов можно сравнивать между собой.
+import json
+import os
+import time
+
+from volatility.archives import trades_size
+
+
+class Phases:
+
+    def __init__(self, timings):
+        self.timings = timings
+        self.last = time.perf_counter()
+
+    def mark(self, phase):
+        now = time.perf_counter()
+        self.timings[phase] = self.timings.get(phase, 0) + now - self.last
+        self.last = now
+
+
+class NoPhases:
+
+    def mark(self, phase):
+        pass
+
+
+NO_PHASES = NoPhases()
+
+
+def phases(timings):
+    return NO_PHASES if timings is None else Phases(timings)
+
+
+def measure(engine, filename, *args):
+    # запускается там же, где движок - в потоке или в дочернем процессе
+    timings = {}
+    start = time.perf_counter()
+    prices = engine(filename, *args, timings=timings)
+    end = time.perf_counter()
+    record = {'file': filename, 'rows': prices[-1], 'worker': os.getpid(), 'start': start, 'end': end}
+    record.update(timings)
+    return prices, record
+
+
+class Instrumentation:
+
+    def __init__(self):
+        self.files = []
+        self.queue_wait = 0
+        self.start = time.perf_counter()
+        self.end = None
+
+    def add(self, record):
+        record.setdefault('bytes', trades_size(record['file']))
+        self.files.append(record)
+
+    def wait(self, seconds):
+        self.queue_wait += seconds
+
+    def finish(self):
+        self.end = time.perf_counter()
+
+    def report(self):
+        wall = (self.end or time.perf_counter()) - self.start
+        rows = sum(record['rows'] for record in self.files)
+        size = sum(record['bytes'] for record in self.files)
+        workers = {}
+        for record in self.files:
+            worker = workers.setdefault(str(record['worker']), {'files': 0, 'busy': 0})
+            worker['files'] += 1
+            worker['busy'] += record['end'] - record['start']
+        for worker in workers.values():
+            worker['utilization'] = worker['busy'] / wall if wall else 0
+        for record in self.files:
+            elapsed = record['end'] - record['start']
+            record['rows_per_sec'] = record['rows'] / elapsed if elapsed else 0
+            record['bytes_per_sec'] = record['bytes'] / elapsed if elapsed else 0
+        return {
+            'wall': wall,
+            'files': len(self.files),
+            'rows': rows,
+            'bytes': size,
+            'rows_per_sec': rows / wall if wall else 0,
+            'bytes_per_sec': size / wall if wall else 0,
+            'queue_wait': self.queue_wait,
+            'queued': sum(record.get('queued', 0) for record in self.files),
+            'phases': {phase: sum(record.get(phase, 0) for record in self.files)
+                       for phase in ('open', 'parse', 'reduce')},
+            'workers': workers,
+            'per_file': self.files,
+        }
+
+    def dump(self, filename):
+        with open(filename, 'w') as report:
+            json.dump(self.report(), report, ensure_ascii=False, indent=2)
@@ -0,0 +1,181 @@
+# -*- coding: utf-8 -*-
+
+# Долгоживущий сервис: пул процессов поднимается один раз, крайние цены каждого файла держатся в памяти,
+# а запросы к тройкам волатильности отвечаются из готового снимка без чтения файлов.
+# Раз в interval секунд папка пересматривается: пересчитываются только файлы с изменившимися размером или
+# временем изменения, удалённые файлы выбрасываются. Новый снимок подменяет старый одним присваиванием,
+# поэтому запросы во время пересчёта получают предыдущий согласованный ответ.
+#
+# Запросы:
+#   HTTP на 127.0.0.1:   GET /top?n=3, /bottom?n=3, /zero, /stats
+#   Unix-сокет, по строке на запрос в одном соединении: 'top 3', 'bottom 3', 'zero', 'stats'
+# Ответ - JSON; bottom упорядочен по возрастанию волатильности.
+import json
+import os
+import socketserver
+import stat
+import time
+import urllib.parse
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from concurrent.futures.process import BrokenProcessPool
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from volatility import engines
+from volatility.api import VolatilityResult, calc_batch, list_tickers, mp_context, plan_batches
+from volatility.archives import trades_stat
+
+QUERIES = ('top', 'bottom', 'zero', 'stats')
+# больше тикеров в одном ответе не отдаём - готовые ответы кэшируются по n, и кэш должен быть ограничен
+MAX_N = 1000
+
+
+class VolatilityIndex:
+
+    def __init__(self, path, engine='auto', workers=None):
+        self.path = path
+        self.engine = engine
+        self.workers = workers or os.cpu_count()
+        self.executor = self.make_executor()
+        self.stats = {}
+        self.prices = {}
+        self.refreshes = 0
+        # (результат, готовые ответы, сведения о последнем пересмотре) - подменяется целиком
+        self.snapshot = VolatilityResult({}, []), {}, {}
+
+    def make_executor(self):
+        # пул из concurrent.futures: убитый процесс ломает пул с BrokenProcessPool, а не вешает пересмотр навсегда
+        return ProcessPoolExecutor(max_workers=self.workers, mp_context=mp_context())
+
+    def close(self):
+        self.executor.shutdown()
+
+    def refresh(self):
+        start = time.perf_counter()
+        tickers = list_tickers(self.path)
+        engines.check_engine(self.engine, tickers)
+        stats, changed = {}, []
+        for ticker in tickers:
+            # отметки берём до пересчёта: если файл изменится во время разбора, следующий пересмотр его повторит
+            stat = trades_stat(ticker)
+            stats[ticker] = stat.st_size, stat.st_mtime_ns
+            if self.stats.get(ticker) != stats[ticker]:
+                changed.append(ticker)
+        prices = {ticker: self.prices[ticker] for ticker in tickers if ticker in self.prices}
+        failed = 0
+        broken = False
+        if changed:
+            # файл, который дописывается прямо сейчас, может не разобраться - calc_batch вернёт для него None
+            batches = plan_batches(changed, self.workers)
+            futures = {self.executor.submit(calc_batch, batch, self.engine): batch for batch in batches}
+            for future in as_completed(futures):
+                try:
+                    results = future.result()
+                except BrokenProcessPool:
+                    # пул сломан: файлы задачи не отмечаем посчитанными, следующий пересмотр их повторит
+                    broken = True
+                    for index, ticker in futures[future]:
+                        del stats[ticker]
+                    continue
+                for index, result in results:
+                    ticker = changed[index]
+                    if result is None:
+                        failed += 1
+                        prices.pop(ticker, None)
+                        del stats[ticker]
+                    else:
+                        prices[ticker] = result
+        if broken:
+            self.executor.shutdown(wait=False)
+            self.executor = self.make_executor()
+        removed = len(set(self.stats) - set(tickers))
+        self.stats, self.prices = stats, prices
+        self.refreshes += 1
+        info = {'files': len(prices), 'changed': len(changed), 'removed': removed, 'failed': failed,
+                'pool_restarted': broken, 'refresh_seconds': time.perf_counter() - start,
+                'refreshed_at': time.time(), 'refreshes': self.refreshes}
+        self.snapshot = VolatilityResult(prices, tickers), {}, info
+        return info
+
+    def query(self, kind, n=3):
+        result, answers, info = self.snapshot
+        n = min(max(int(n), 0), MAX_N)
+        key = kind, (n if kind in ('top', 'bottom') else None)
+        answer = answers.get(key)
+        if answer is None:
+            if kind == 'top':
+                value = [[secid, volatility] for secid, volatility in result.top(n).items()]
+            elif kind == 'bottom':
+                value = [[secid, volatility] for secid, volatility in result.bottom(n).items()]
+            elif kind == 'zero':
+                value = result.zero_volatilities
+            elif kind == 'stats':
+                value = info
+            else:
+                raise KeyError('Неизвестный запрос %s, доступны: %s' % (kind, ', '.join(QUERIES)))
+            answer = answers[key] = json.dumps({kind: value}, ensure_ascii=False).encode('utf-8')
+        return answer
+
+
+def error_answer(exc):
+    return json.dumps({'error': str(exc)}, ensure_ascii=False).encode('utf-8')
+
+
+class HTTPHandler(BaseHTTPRequestHandler):
+    # keep-alive и без алгоритма Нейгла: иначе маленький ответ ждёт подтверждения десятки миллисекунд
+    protocol_version = 'HTTP/1.1'
+    disable_nagle_algorithm = True
+
+    def do_GET(self):
+        url = urllib.parse.urlsplit(self.path)
+        params = urllib.parse.parse_qs(url.query)
+        try:
+            body, status = self.server.index.query(url.path.strip('/'), params.get('n', ['3'])[0]), 200
+        except (KeyError, ValueError) as exc:
+            body, status = error_answer(exc), 404
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class SocketHandler(socketserver.StreamRequestHandler):
+
+    def handle(self):
+        for line in self.rfile:
+            words = line.decode('utf-8').split()
+            try:
+                answer = self.server.index.query(*words) if words else error_answer('пустой запрос')
+            except (KeyError, ValueError, TypeError) as exc:
+                answer = error_answer(exc)
+            self.wfile.write(answer + b'\n')
+
+
+class UnixServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+
+def make_server(index, port=None, socket_path=None, host='127.0.0.1'):
+    if socket_path:
+        # удаляем только оставшийся от прошлого запуска сокет, а не любой файл по этому пути
+        if os.path.lexists(socket_path):
+            if not stat.S_ISSOCK(os.lstat(socket_path).st_mode):
+                raise FileExistsError('По пути %s лежит не сокет' % socket_path)
+            os.unlink(socket_path)
+        server = UnixServer(socket_path, SocketHandler)
+    else:
+        server = ThreadingHTTPServer((host, port), HTTPHandler)
+    server.index = index
+    return server
+
+
+def refresh_forever(index, interval, stop):
+    while not stop.wait(interval):
+        try:
+            index.refresh()
+        except Exception as exc:
+            # папку могли временно убрать - отвечаем по последнему снимку и пробуем снова
+            print('ошибка пересмотра папки:', exc, flush=True)
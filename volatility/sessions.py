@@ -0,0 +1,64 @@
+# -*- coding: utf-8 -*-
+
+# Пакетный режим по многим торговым сессиям: папка вида
+#   history/2019-01-10/TICKER_AFH9.csv
+#   history/2019-01-11/TICKER_AFH9.csv
+# Сессия - дата, найденная в пути файла, а если даты нет - подпапка, в которой лежит файл.
+# Все файлы всех сессий считаются одним вызовом compute_volatilities, то есть одним пулом процессов,
+# а результаты раскладываются по сессиям уже по именам файлов - один тикер в разных сессиях не смешивается.
+# Сводная волатильность по всем сессиям считается по крайним ценам тикера за весь период.
+import os
+import re
+from collections import OrderedDict
+
+from volatility.api import VolatilityResult, compute_volatilities, list_tickers
+
+# 2019-01-10, 2019_01_10 или 20190110
+DATE_PATTERN = re.compile(r'(?<!\d)(\d{4})[-_]?(\d{2})[-_]?(\d{2})(?!\d)')
+ROOT_SESSION = '.'
+
+
+def session_name(path, filename):
+    relative = os.path.relpath(filename, path)
+    match = DATE_PATTERN.search(relative)
+    if match:
+        return '-'.join(match.groups())
+    return os.path.dirname(relative) or ROOT_SESSION
+
+
+def find_sessions(path):
+    sessions = {}
+    for ticker in list_tickers(path):
+        sessions.setdefault(session_name(path, ticker), []).append(ticker)
+    return OrderedDict((name, sorted(sessions[name])) for name in sorted(sessions))
+
+
+def merge_sessions(results):
+    # крайние цены тикера по всем сессиям: минимум минимумов, максимум максимумов, сделки суммируются
+    merged = OrderedDict()
+    for result in results:
+        for secid, min_price, max_price, rows in result.prices.values():
+            if secid in merged:
+                _, low, high, total = merged[secid]
+                min_price, max_price, rows = min(min_price, low), max(max_price, high), rows + total
+            merged[secid] = secid, min_price, max_price, rows
+    return VolatilityResult(merged, list(merged))
+
+
+class SessionsResult:
+
+    def __init__(self, prices, sessions):
+        self.sessions = OrderedDict()
+        for name, tickers in sessions.items():
+            session_prices = {ticker: prices[ticker] for ticker in tickers if ticker in prices}
+            self.sessions[name] = VolatilityResult(session_prices, tickers)
+        self.overall = merge_sessions(self.sessions.values())
+        self.failed = [ticker for result in self.sessions.values() for ticker in result.failed]
+
+
+def compute_sessions(path, **options):
+    # options - те же параметры, что у compute_volatilities: engine, mode, workers, cache_dir, instrument...
+    sessions = find_sessions(path)
+    tickers = [ticker for session in sessions.values() for ticker in session]
+    result = compute_volatilities(tickers, **options)
+    return SessionsResult(result.prices, sessions)
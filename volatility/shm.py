@@ -0,0 +1,71 @@
+# -*- coding: utf-8 -*-
+
+# Таблица результатов в разделяемой памяти вместо очереди.
+# Под каждый файл заранее отведена строка фиксированной ширины: (min, max, число сделок, SECID)
+# и замеры времени, если они включены.
+# Процесс пишет результат прямо в свою строку по номеру файла, родитель читает таблицу один раз в конце -
+# ни сообщений на каждый файл, ни pickle.
+import struct
+from multiprocessing import shared_memory
+
+# SECID длиннее поля struct молча обрезал бы, и родитель прочитал бы другой тикер
+SECID_SIZE = 16
+RECORD = struct.Struct('<ddq%dsdddddq' % SECID_SIZE)
+TIMINGS = ('start', 'end', 'open', 'parse', 'reduce')
+
+
+def attach(name):
+    # дочерние процессы работают с тем же resource_tracker, что и родитель, поэтому повторная
+    # регистрация блока при подключении безвредна; удаляет блок только создавший его родитель
+    try:
+        return shared_memory.SharedMemory(name=name, track=False)
+    except TypeError:
+        return shared_memory.SharedMemory(name=name)
+
+
+class ResultTable:
+
+    def __init__(self, size=None, name=None):
+        if name is None:
+            # новый блок заполнен нулями, то есть все строки изначально пустые
+            self.memory = shared_memory.SharedMemory(create=True, size=max(size, 1) * RECORD.size)
+            self.owner = True
+        else:
+            self.memory = attach(name)
+            self.owner = False
+        self.name = self.memory.name
+
+    def write(self, index, prices, record=None):
+        secid, min_price, max_price, rows = prices
+        encoded = secid.encode('ascii')
+        if len(encoded) > SECID_SIZE:
+            raise ValueError('Тикер %s длиннее %d байт и не помещается в таблицу' % (secid, SECID_SIZE))
+        timings = [record.get(name, 0) for name in TIMINGS] if record else [0] * len(TIMINGS)
+        RECORD.pack_into(self.memory.buf, index * RECORD.size, min_price, max_price, rows, encoded,
+                         *timings, record['worker'] if record else 0)
+
+    def read(self, index):
+        # строка с нулём сделок - файл не обработан (процесс упал или файл пустой)
+        min_price, max_price, rows, secid = RECORD.unpack_from(self.memory.buf, index * RECORD.size)[:4]
+        if not rows:
+            return None
+        return secid.rstrip(b'\0').decode('ascii'), min_price, max_price, rows
+
+    def read_record(self, index):
+        values = RECORD.unpack_from(self.memory.buf, index * RECORD.size)
+        if not values[2] or not values[-1]:
+            return None
+        record = dict(zip(TIMINGS, values[4:-1]))
+        record.update(rows=values[2], worker=values[-1])
+        return record
+
+    def close(self):
+        self.memory.close()
+        if self.owner:
+            self.memory.unlink()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
@@ -0,0 +1,155 @@
+# -*- coding: utf-8 -*-
+
+# Потоковый подсчёт волатильности по дописываемым файлам сделок.
+# Для каждого файла запоминаются смещение последней дочитанной строки и текущие крайние цены,
+# поэтому обновление читает только новые строки, а не файлы целиком.
+#
+# При дописывании сделок волатильность тикера не убывает: рост максимума или падение минимума
+# только увеличивают (max - min) / (max + min). Поэтому тройка максимальных обновляется слиянием
+# старой тройки с изменившимися тикерами, а тройка минимальных пересчитывается целиком,
+# только если изменился кто-то из неё самой.
+import os
+
+from volatility import archives, engines, topk
+
+TAIL_BLOCK = 64 * 1024
+
+
+class TickerState:
+
+    def __init__(self, filename):
+        self.filename = filename
+        self.offset = 0
+        self.pattern = None
+        self.secid_index = None
+        self.secid = None
+        self.min_price = None
+        self.max_price = None
+        self.rows = 0
+
+    def last_line_end(self, ticker, size):
+        # конец последней целой строки: недописанный хвост оставляем до следующего обновления
+        position = size
+        while position > self.offset:
+            start = max(position - TAIL_BLOCK, self.offset)
+            ticker.seek(start)
+            found = ticker.read(position - start).rfind(b'\n')
+            if found >= 0:
+                return start + found + 1
+            position = start
+        return self.offset
+
+    def update(self, size):
+        with open(self.filename, 'rb') as ticker:
+            if self.pattern is None:
+                head = ticker.readline()
+                if not head.endswith(b'\n'):
+                    return False
+                self.secid_index, self.pattern = engines.price_pattern(head)
+                self.offset = len(head)
+            end = self.last_line_end(ticker, size)
+            if end <= self.offset:
+                return False
+            # тикер, как и в python_prices, - из последней целой строки: недописанный хвост его не обрежет
+            secid = engines.last_secid(ticker, self.offset, self.secid_index, end)
+            min_price, max_price, rows = engines.scan_prices(ticker.fileno(), self.pattern, self.offset, end)
+        self.offset = end
+        if not rows:
+            return False
+        changed = (secid != self.secid or self.min_price is None or min_price < self.min_price
+                   or max_price > self.max_price)
+        self.secid = secid
+        if self.min_price is None or min_price < self.min_price:
+            self.min_price = min_price
+        if self.max_price is None or max_price > self.max_price:
+            self.max_price = max_price
+        self.rows += rows
+        return changed
+
+    @property
+    def volatility(self):
+        return engines.price_volatility(self.min_price, self.max_price)
+
+
+class StreamingVolatility:
+
+    def __init__(self, path, n=3):
+        self.path = path
+        self.n = n
+        self.states = {}
+        self.volatilities = {}
+        self.zero_volatilities = set()
+        self.max_list = []
+        self.min_list = []
+
+    def refresh(self):
+        changed = []
+        rebuild = False
+        seen = set()
+        for dirpath, dirnames, filenames in os.walk(self.path):
+            for file in filenames:
+                filename = os.path.join(dirpath, file)
+                # сжатый файл или архив не дописывается построчно и с середины не читается - пропускаем
+                if archives.is_compressed(filename) or archives.is_archive(filename):
+                    continue
+                try:
+                    size = os.path.getsize(filename)
+                except OSError:
+                    continue
+                seen.add(filename)
+                state = self.states.get(filename)
+                if state is not None and size < state.offset:
+                    # файл перезаписан заново - старые крайние цены больше не действуют
+                    self.forget(state)
+                    rebuild = True
+                    state = None
+                if state is None:
+                    state = self.states[filename] = TickerState(filename)
+                secid = state.secid
+                if size > state.offset and state.update(size):
+                    changed.append(state)
+                    if secid is not None and secid != state.secid:
+                        # в последней строке теперь другой тикер - прежний из отчёта убираем
+                        self.volatilities.pop(secid, None)
+                        self.zero_volatilities.discard(secid)
+                        rebuild = True
+        for filename in set(self.states) - seen:
+            self.forget(self.states.pop(filename))
+            rebuild = True
+
+        changed_secids = {}
+        for state in changed:
+            volatility = state.volatility
+            if volatility == 0:
+                self.zero_volatilities.add(state.secid)
+            else:
+                self.zero_volatilities.discard(state.secid)
+                self.volatilities[state.secid] = volatility
+                changed_secids[state.secid] = None
+
+        if rebuild:
+            self.max_list = self.select(self.volatilities, reverse=True)
+            self.min_list = self.select(self.volatilities, reverse=False)
+        elif changed_secids:
+            self.max_list = self.select(self.candidates(self.max_list, changed_secids), reverse=True)
+            if any(secid in changed_secids for secid, _ in self.min_list):
+                self.min_list = self.select(self.volatilities, reverse=False)
+            else:
+                self.min_list = self.select(self.candidates(self.min_list, changed_secids), reverse=False)
+        return len(changed)
+
+    def forget(self, state):
+        if state.secid is None:
+            return
+        self.volatilities.pop(state.secid, None)
+        self.zero_volatilities.discard(state.secid)
+
+    def candidates(self, selected, changed_secids):
+        secids = dict.fromkeys([secid for secid, _ in selected] + list(changed_secids))
+        return {secid: self.volatilities[secid] for secid in secids}
+
+    def select(self, volatilities, reverse):
+        return list(topk.select(volatilities, n=self.n, reverse=reverse).items())
+
+    def report(self):
+        return self.max_list, self.min_list, sorted(self.zero_volatilities)
@@ -0,0 +1,13 @@
+# -*- coding: utf-8 -*-
+
+# Выбор K максимальных и K минимальных волатильностей без полной сортировки.
+# Порядок совпадает со стабильной сортировкой словаря по значению: при равных волатильностях
+# раньше идёт тикер, попавший в словарь раньше.
+import heapq
+from collections import OrderedDict
+
+
+def select(volatilities, n=3, reverse=False):
+    pick = heapq.nlargest if reverse else heapq.nsmallest
+    return OrderedDict(pick(n, volatilities.items(), key=lambda item: item[1]))
+
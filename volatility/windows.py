@@ -0,0 +1,207 @@
+# -*- coding: utf-8 -*-
+
+# Волатильность внутри сессии по времени сделок:
+#   интервалы - (max - min) / среднее по сделкам каждого интервала в step секунд, отсчитанных от полуночи;
+#   скользящее окно - то же по сделкам за последние width секунд. Окно снимается в конце каждого интервала,
+#   а пиковое значение ищется по всем сделкам.
+# В одном файле бывают несколько торговых дней подряд: время сделки меньше предыдущего - начался следующий день.
+# Всё считается за один проход по файлу пачками строк. Кроме выходных рядов в памяти только текущий интервал
+# и сделки, попавшие в скользящее окно.
+from collections import deque
+
+from volatility.archives import open_trades
+from volatility.binstore import parse_time
+from volatility.engines import FAST_BATCH, price_volatility
+from volatility.instrument import phases
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+DAY = 24 * 3600
+
+
+class RollingExtremes:
+    # минимум и максимум по скользящему окну на монотонных очередях (время, цена):
+    # в lows цены возрастают, в highs убывают, поэтому крайние цены окна всегда в голове очереди.
+    # Каждая сделка один раз входит и не больше одного раза выходит из каждой очереди.
+
+    def __init__(self, width):
+        self.width = width
+        self.lows = deque()
+        self.highs = deque()
+
+    def push(self, moment, price):
+        lows, highs = self.lows, self.highs
+        while lows and lows[-1][1] >= price:
+            lows.pop()
+        lows.append((moment, price))
+        while highs and highs[-1][1] <= price:
+            highs.pop()
+        highs.append((moment, price))
+
+    def expire(self, now):
+        # в окне остаются сделки из полуинтервала (now - width, now]
+        edge = now - self.width
+        while self.lows and self.lows[0][0] <= edge:
+            self.lows.popleft()
+        while self.highs and self.highs[0][0] <= edge:
+            self.highs.popleft()
+
+    def clear(self):
+        self.lows.clear()
+        self.highs.clear()
+
+    def extremes(self):
+        if not self.lows:
+            return None, None
+        return self.lows[0][1], self.highs[0][1]
+
+
+class WindowedSeries:
+    # buckets: (день, начало интервала в секундах, волатильность, min, max, сделок)
+    # rolling: (день, конец интервала в секундах, волатильность окна, min, max)
+    # peak:    (волатильность, день, время сделки в секундах) - наибольшая волатильность скользящего окна
+
+    def __init__(self, step, width=None):
+        self.step = step
+        self.width = width
+        self.buckets = []
+        self.rolling = []
+        self.peak = None
+        self.secid = None
+        self.min_price = self.max_price = None
+        self.rows = 0
+        # текущий, ещё не закрытый интервал: [день, начало, min, max, сделок]
+        self.current = None
+
+    @property
+    def prices(self):
+        return self.secid, self.min_price, self.max_price, self.rows
+
+    def snapshot(self, window):
+        # снимок окна на конец текущего интервала, пока следующая сделка в окно не попала:
+        # как и сам интервал, снимок не включает сделки ровно в момент его конца - (end - width, end)
+        day, start = self.current[0], self.current[1]
+        window.expire(start + self.step)
+        low, high = window.extremes()
+        if low is not None:
+            self.rolling.append((day, start + self.step, price_volatility(low, high), low, high))
+
+    def close_bucket(self):
+        day, start, low, high, rows = self.current
+        self.buckets.append((day, start, price_volatility(low, high), low, high, rows))
+        self.current = None
+
+    def add_bucket(self, day, start, low, high, rows):
+        current = self.current
+        if current is not None and current[0] == day and current[1] == start:
+            current[2], current[3], current[4] = min(current[2], low), max(current[3], high), current[4] + rows
+            return
+        if current is not None:
+            self.close_bucket()
+        self.current = [day, start, low, high, rows]
+
+    def finish(self):
+        if self.current is not None:
+            self.close_bucket()
+        if self.buckets:
+            self.min_price = min(bucket[3] for bucket in self.buckets)
+            self.max_price = max(bucket[4] for bucket in self.buckets)
+        return self
+
+
+def scan_rows(series, lines, time_index, price_index, state):
+    # построчный проход: нужен скользящему окну, без numpy считает и интервалы
+    step, window = series.step, state['window']
+    day, last = state['day'], state['last']
+    current = series.current
+    for line in lines:
+        data = line.split(',')
+        moment, price = parse_time(data[time_index]), float(data[price_index])
+        next_day = last is not None and moment < last
+        if next_day:
+            day += 1
+        last = moment
+        start = moment - moment % step
+        if current is None or current[1] != start or current[0] != day:
+            if current is not None:
+                if window is not None:
+                    series.snapshot(window)
+                series.close_bucket()
+            current = series.current = [day, start, price, price, 0]
+        if next_day and window is not None:
+            window.clear()
+        if price < current[2]:
+            current[2] = price
+        if price > current[3]:
+            current[3] = price
+        current[4] += 1
+        if window is not None:
+            window.push(moment, price)
+            window.expire(moment)
+            low, high = window.extremes()
+            volatility = price_volatility(low, high)
+            if series.peak is None or volatility > series.peak[0]:
+                series.peak = volatility, day, moment
+    state['day'], state['last'] = day, last
+
+
+def parse_times(times):
+    # время в виде HH:MM:SS разбирается целым массивом: байты строки минус код '0' - это цифры
+    digits = numpy.array(times, dtype='S8').view(numpy.uint8).reshape(-1, 8).astype(numpy.int64) - ord('0')
+    if not ((digits[:, 2] == ord(':') - ord('0')) & (digits[:, 5] == ord(':') - ord('0'))).all():
+        return numpy.array([parse_time(value) for value in times], dtype=numpy.int64)
+    return ((digits[:, 0] * 10 + digits[:, 1]) * 3600 + (digits[:, 3] * 10 + digits[:, 4]) * 60
+            + digits[:, 6] * 10 + digits[:, 7])
+
+
+def bucket_rows(series, lines, time_index, price_index, state):
+    # интервалы без скользящего окна: номер дня и начало интервала считаются для всей пачки сразу,
+    # строки одного интервала идут подряд, поэтому min/max по интервалам - reduceat по границам смены ключа
+    last_index = max(time_index, price_index)
+    fields = [line.rstrip().split(',', last_index + 1) for line in lines]
+    moments = parse_times([data[time_index] for data in fields])
+    prices = numpy.array([data[price_index] for data in fields]).astype(numpy.float64)
+    previous = numpy.empty_like(moments)
+    previous[0] = moments[0] if state['last'] is None else state['last']
+    previous[1:] = moments[:-1]
+    days = state['day'] + numpy.cumsum(moments < previous)
+    keys = days * DAY + moments - moments % series.step
+    starts = numpy.concatenate(([0], numpy.flatnonzero(numpy.diff(keys)) + 1))
+    lows = numpy.minimum.reduceat(prices, starts)
+    highs = numpy.maximum.reduceat(prices, starts)
+    counts = numpy.diff(numpy.append(starts, len(keys)))
+    for index, first in enumerate(starts.tolist()):
+        series.add_bucket(int(days[first]), int(keys[first] % DAY), float(lows[index]), float(highs[index]),
+                          int(counts[index]))
+    state['day'], state['last'] = int(days[-1]), int(moments[-1])
+
+
+def windowed_prices(filename, step=300, width=None, timings=None):
+    # step и width - в секундах; без width скользящее окно не считается
+    phase = phases(timings)
+    series = WindowedSeries(step, width)
+    state = {'day': 0, 'last': None, 'window': RollingExtremes(width) if width else None}
+    scan = bucket_rows if numpy is not None and not width else scan_rows
+    with open_trades(filename) as ticker:
+        head = ticker.readline().rstrip().split(',')
+        secid_index, time_index, price_index = head.index('SECID'), head.index('TRADETIME'), head.index('PRICE')
+        phase.mark('open')
+        last = None
+        while True:
+            lines = ticker.readlines(FAST_BATCH)
+            if not lines:
+                break
+            scan(series, lines, time_index, price_index, state)
+            series.rows += len(lines)
+            last = lines[-1]
+            phase.mark('parse')
+    if last is not None:
+        series.secid = last.rstrip().split(',')[secid_index]
+    if state['window'] is not None and series.current is not None:
+        series.snapshot(state['window'])
+    series.finish()
+    phase.mark('reduce')
+    return series